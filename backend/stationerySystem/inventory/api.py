@@ -1,12 +1,20 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Category, InventoryItem, TeacherInventoryItem
+from rest_framework.permissions import IsAuthenticated
+from .models import InventoryItem, TeacherInventoryItem
 from .serializers import (
     CategorySerializer,
     InventoryItemSerializer,
     TeacherInventorySerializer
 )
+from .services import deduct_stock, import_inventory, InsufficientStockError, IMPORT_MODES
+from stationerySystem.filters import filter_by_params
+from stationerySystem.pagination import paginate
+from stationerySystem.reference_cache import reference_response, get_version
+from stationerySystem.conditional import conditional_list
+from stationerySystem.imports import import_status, is_dry_run, rows_from_request
+from stationerySystem.serializers import get_requested_fields
 
 # ---------------------
 # CATEGORY MANAGEMENT
@@ -16,10 +24,8 @@ class CategoryListView(APIView):
     permission_classes = []  # Explicitly allow unauthenticated access
 
     def get(self, request):
-        # Fetch all stationery categories
-        categories = Category.objects.all()
-        serializer = CategorySerializer(categories, many=True)
-        return Response(serializer.data)
+        # Fetch all stationery categories (cached until a category changes, ETag-aware)
+        return reference_response(request, 'categories')
     
     def post(self, request):
         # Create a new category, automatically mark it as custom
@@ -37,19 +43,68 @@ class InventoryItemView(APIView):
     permission_classes = []  # Explicitly allow unauthenticated access
 
     def get(self, request):
-        # List all inventory items with related categories
+        # List inventory items with related categories
+        # Supports ?status=, ?category=, ?start_date=/?end_date= (last update), ?fields= and cursor pagination
         items = InventoryItem.objects.select_related('category').all()
-        serializer = InventoryItemSerializer(items, many=True)
-        return Response(serializer.data)
+        items = filter_by_params(
+            items, request.query_params,
+            {'status': 'status', 'category': 'category_id'},
+            date_field='updated_at'
+        )
+        # Unchanged lists are answered with 304 before any row is serialised
+        return conditional_list(
+            request, items,
+            lambda: paginate(items, request, self, InventoryItemSerializer, fields=get_requested_fields(request)),
+            extra=[get_version('categories')]    # Items nest their category
+        )
     
     def post(self, request):
         # Create a new inventory item
-        serializer = InventoryItemSerializer(data=request.data)
+        serializer = InventoryItemSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# ---------------------
+# BULK IMPORT (SUPPLIER DELIVERIES, STOCK COUNTS)
+# ---------------------
+
+class InventoryImportView(APIView):
+    """
+    Upserts items by name from a JSON list or an uploaded CSV/JSON "file" with the
+    columns name, category, quantity and (optional) low_stock_threshold.
+    ?mode=add (default) adds the quantities to the stock, ?mode=set replaces them;
+    ?dry_run=true only validates. Stock managers and admins only.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        user = request.user
+        if not user.is_stock_manager and not user.is_admin:
+            return Response(
+                {"error": "Only stock managers can import inventory"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        mode = request.query_params.get('mode', 'add')
+        if mode not in IMPORT_MODES:
+            return Response(
+                {"error": f"mode must be one of {', '.join(IMPORT_MODES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            rows = rows_from_request(request, 'items')
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = import_inventory(
+            rows, mode=mode, changed_by=user,
+            reason=request.query_params.get('reason', ''), dry_run=is_dry_run(request)
+        )
+        written = result['created'] or result['updated']
+        return Response(result, status=import_status(written, result['errors']))
+
 # ---------------------
 # DEDUCT INVENTORY ITEMS
 # ---------------------
@@ -60,35 +115,38 @@ class InventoryDeductView(APIView):
 
     def post(self, request, pk):
         try:
-            item = InventoryItem.objects.get(pk=pk)
-            quantity = request.data.get('quantity', 0)
-            
-            # Defensive check: ensure quantity is available
-            if item.quantity < quantity:
-                return Response(
-                    {"error": "Not enough items in inventory"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-             # Deduct and update item quantity    
-            item.quantity -= quantity
-            item.save()
-            
-             # Update status if item is now low
-            if item.quantity <= item.low_stock_threshold:
-                item.status = 'low_stock'
-                item.save()
-            
+            quantity = int(request.data.get('quantity', 0))
+        except (TypeError, ValueError):
+            quantity = 0
+        if quantity <= 0:
             return Response(
-                InventoryItemSerializer(item).data,
-                status=status.HTTP_200_OK
+                {"error": "Quantity must be a positive whole number"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            # Row-locked deduction; status is recomputed and the change logged in one transaction
+            item = deduct_stock(
+                pk, quantity,
+                changed_by=request.user if request.user.is_authenticated else None
             )
-            
         except InventoryItem.DoesNotExist:
             return Response(
                 {"error": "Item not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
+        except InsufficientStockError:
+            # Defensive check: ensure quantity is available
+            return Response(
+                {"error": "Not enough items in inventory"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            InventoryItemSerializer(item).data,
+            status=status.HTTP_200_OK
+        )
+
 # ---------------------
 # INVENTORY ITEM DETAIL VIEW
 # ---------------------
@@ -113,7 +171,7 @@ class InventoryItemDetailView(APIView):
     def put(self, request, pk):
         item = self.get_object(pk)
         if item:
-            serializer = InventoryItemSerializer(item, data=request.data)
+            serializer = InventoryItemSerializer(item, data=request.data, context={'request': request})
             if serializer.is_valid():
                 serializer.save()
                 return Response(serializer.data)
@@ -135,10 +193,15 @@ class TeacherInventoryView(APIView):
     permission_classes = []  # Already set, kept for clarity
 
     def get(self, request):
-        # List all teacher-assigned inventory (for admin/manager review)
+        # List teacher-assigned inventory (for admin/manager review)
+        # Supports ?item=, ?category=, ?user= (teacher), ?start_date=/?end_date=, ?fields= and cursor pagination
         items = TeacherInventoryItem.objects.select_related('item', 'item__category').all()
-        serializer = TeacherInventorySerializer(items, many=True)
-        return Response(serializer.data)
+        items = filter_by_params(
+            items, request.query_params,
+            {'item': 'item_id', 'category': 'item__category_id', 'user': 'teacher_id'},
+            date_field='updated_at'
+        )
+        return paginate(items, request, self, TeacherInventorySerializer, fields=get_requested_fields(request))
     
     def post(self, request):
         # Assign a stationery item to a teacher
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        # Cached category list is invalidated whenever a category changes
+        from stationerySystem.reference_cache import register
+        from .models import Category
+        from .serializers import CategorySerializer
+        register('categories', lambda: CategorySerializer(Category.objects.all(), many=True).data, Category)
@@ -0,0 +1,57 @@
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from inventory.services import import_inventory, IMPORT_MODES
+from stationerySystem.imports import guess_format, parse_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates or updates inventory items in bulk from a CSV or JSON file with the columns name, "
+        "category, quantity and optionally low_stock_threshold, matched on the item name. "
+        "Missing categories are created; every quantity change is logged in the stock ledger."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSON file to import")
+        parser.add_argument('--format', choices=['csv', 'json'],
+                            help="File format (default: guessed from the extension)")
+        parser.add_argument('--mode', choices=IMPORT_MODES, default='add',
+                            help="'add' quantities to the stock (a delivery) or 'set' them (a stock count)")
+        parser.add_argument('--reason', default='', help="Reason recorded in the stock ledger")
+        parser.add_argument('--user', metavar='EMAIL', help="User recorded as having made the changes")
+        parser.add_argument('--dry-run', action='store_true', help="Validate the file without changing anything")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, encoding='utf-8-sig') as source:
+                rows = parse_rows(source.read(), options['format'] or guess_format(path))
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        changed_by = None
+        if options['user']:
+            changed_by = User.objects.filter(email=options['user']).first()
+            if changed_by is None:
+                raise CommandError(f"No user with the email {options['user']}")
+
+        started = time.monotonic()
+        result = import_inventory(
+            rows, mode=options['mode'], changed_by=changed_by,
+            reason=options['reason'], dry_run=options['dry_run']
+        )
+
+        for error in result['errors']:
+            self.stderr.write(self.style.ERROR(
+                f"Row {error['row']} ({error['name'] or 'no name'}): {' '.join(error['errors'])}"
+            ))
+        if options['dry_run']:
+            self.stdout.write(f"{len(rows) - len(result['errors'])} of {len(rows)} row(s) are valid.")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Created {len(result['created'])} and updated {len(result['updated'])} item(s), "
+                f"skipped {len(result['errors'])} row(s) in {time.monotonic() - started:.2f}s."
+            ))
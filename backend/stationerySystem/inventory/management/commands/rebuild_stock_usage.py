@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Abs, Coalesce, TruncDate
+from inventory.models import StockLog, DailyStockUsage
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the DailyStockUsage rollup from the StockLog ledger (e.g. after first deploying the rollup)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rollup rows inserted per statement")
+
+    def handle(self, *args, **options):
+        # One grouped query over the ledger: a row per item and day
+        daily_totals = StockLog.objects.annotate(
+            day=TruncDate('timestamp')
+        ).order_by().values('item_id', 'day').annotate(
+            units_out=Coalesce(Abs(Sum('change', filter=Q(change__lt=0))), 0),
+            units_in=Coalesce(Sum('change', filter=Q(change__gt=0)), 0),
+            request_count=Count('id', filter=Q(request__isnull=False)),
+        )
+
+        rows = (
+            DailyStockUsage(
+                item_id=total['item_id'],
+                day=total['day'],
+                units_out=total['units_out'],
+                units_in=total['units_in'],
+                request_count=total['request_count'],
+            )
+            for total in daily_totals.iterator()
+        )
+
+        # Replace the rollup atomically so reports never see a half-built table
+        with transaction.atomic():
+            deleted, _ = DailyStockUsage.objects.all().delete()
+            created = 0
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= options['batch_size']:
+                    created += len(DailyStockUsage.objects.bulk_create(batch))
+                    batch = []
+            if batch:
+                created += len(DailyStockUsage.objects.bulk_create(batch))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt stock usage rollup: {created} rows written ({deleted} replaced)."
+        ))
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_stocklog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStockUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units_out', models.PositiveIntegerField(default=0)),
+                ('units_in', models.PositiveIntegerField(default=0)),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='inventory.inventoryitem')),
+            ],
+            options={
+                'ordering': ['-day'],
+                'unique_together': {('item', 'day')},
+            },
+        ),
+    ]
@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from datetime import datetime
 
 # Object-oriented model of data entities with field-level constraints.
 
@@ -13,6 +16,28 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+# Reusable query logic for inventory items (chainable from InventoryItem.objects)
+class InventoryItemQuerySet(models.QuerySet):
+    def with_usage(self, start_date=None, end_date=None):
+        """
+        Annotates each item with `usage_total`: the units taken out of stock in the optional
+        date range (whole days). Read from the DailyStockUsage rollup with one correlated
+        subquery, instead of aggregating raw StockLog rows per item.
+        """
+        usage = DailyStockUsage.objects.filter(item=OuterRef('pk'))
+        if start_date:
+            usage = usage.filter(day__gte=as_date(start_date))
+        if end_date:
+            usage = usage.filter(day__lte=as_date(end_date))
+        usage = usage.order_by().values('item').annotate(total=Sum('units_out')).values('total')
+        return self.annotate(
+            usage_total=Coalesce(Subquery(usage, output_field=models.IntegerField()), Value(0))
+        )
+
+def as_date(value):
+    # Report filters may be dates or datetimes; the rollup is per day
+    return value.date() if isinstance(value, datetime) else value
+
 # Represents an inventory item in stock.
 class InventoryItem(models.Model):
     STATUS_CHOICES = [
@@ -30,18 +55,29 @@ class InventoryItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InventoryItemQuerySet.as_manager()
+
     # Track quantity before update for logging
     _previous_quantity = None
+    _previous_low_stock_threshold = None
 
     # Custom object instantiation method from DB
     @classmethod
     def from_db(cls, db, field_names, values):
         instance = super().from_db(db, field_names, values)
-        # Store the original quantity when loaded from DB
-        instance._previous_quantity = instance.quantity
+        # Store the original quantity and threshold when loaded from DB
+        # (read from __dict__ so deferred fields don't trigger extra queries)
+        instance._previous_quantity = instance.__dict__.get('quantity')
+        instance._previous_low_stock_threshold = instance.__dict__.get('low_stock_threshold')
         return instance
 
-    def save(self, *args, **kwargs):
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        # Reloaded values are the new baseline for the next logged change
+        self._previous_quantity = self.__dict__.get('quantity')
+        self._previous_low_stock_threshold = self.__dict__.get('low_stock_threshold')
+
+    def update_status(self):
         """Update status based on quantity and threshold"""
         if self.quantity == 0:
             self.status = 'out_of_stock'
@@ -49,7 +85,38 @@ class InventoryItem(models.Model):
             self.status = 'low_stock'
         else:
             self.status = 'in_stock'
-        super().save(*args, **kwargs)
+
+    def save(self, *args, changed_by=None, request=None, reason='', **kwargs):
+        """
+        Saves the item and appends a StockLog row whenever the quantity changed,
+        so the ledger always matches the stored quantity.
+        `changed_by`, `request` and `reason` describe the change in the ledger.
+        """
+        self.update_status()
+
+        created = self._state.adding
+        if created:
+            change = self.quantity
+        elif self._previous_quantity is not None:
+            change = self.quantity - self._previous_quantity
+        else:
+            change = 0  # Not loaded from the database, so the previous quantity is unknown
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if change:
+                StockLog.objects.create(
+                    item=self,
+                    change=change,
+                    quantity_after_change=self.quantity,
+                    changed_by=changed_by,
+                    request=request,
+                    reason=reason or ('Initial Count' if created else 'Restock' if change > 0 else 'Manual Update')
+                )
+
+        # The saved state becomes the baseline for the next save of this instance
+        self._previous_quantity = self.quantity
+        self._previous_low_stock_threshold = self.low_stock_threshold
 
     def __str__(self):
         return f"{self.name} ({self.category.name})"
@@ -136,5 +203,100 @@ class StockLog(models.Model):
             models.Index(fields=['item', '-timestamp']),    # Indexed for query optimization
         ]
 
+    def save(self, *args, **kwargs):
+        # New ledger rows are added to the daily rollup in the same transaction
+        # (bulk_create bypasses this, so bulk writers call DailyStockUsage.add_logs themselves)
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                DailyStockUsage.add_logs([self])
+
+    def __str__(self):
+        return f"{self.item.name} @ {self.timestamp.strftime('%Y-%m-%d %H:%M')}: {self.change:+} -> {self.quantity_after_change} ({self.reason})"
+
+# Pre-aggregated daily usage per item, kept in step with StockLog so reports don't scan the raw ledger.
+class DailyStockUsage(models.Model):
+    item = models.ForeignKey(InventoryItem, related_name='daily_usage', on_delete=models.CASCADE)
+    day = models.DateField()
+    units_out = models.PositiveIntegerField(default=0)     # Sum of negative changes (as a positive number)
+    units_in = models.PositiveIntegerField(default=0)      # Sum of positive changes
+    request_count = models.PositiveIntegerField(default=0) # Ledger rows caused by requests
+
+    class Meta:
+        unique_together = ('item', 'day')   # One row per item per day (also serves item/day range lookups)
+        ordering = ['-day']
+
+    @classmethod
+    def add_logs(cls, logs):
+        """
+        Incrementally adds newly written StockLog rows to the rollup.
+        Rows are grouped per item and day first. A single group costs one UPDATE (plus an
+        INSERT the first time an item changes on a given day); larger batches cost one
+        SELECT, one bulk UPDATE and one bulk INSERT whatever the number of groups.
+        """
+        totals = {}
+        for log in logs:
+            key = (log.item_id, timezone.localdate(log.timestamp))
+            units_out, units_in, request_count = totals.get(key, (0, 0, 0))
+            totals[key] = (
+                units_out + max(-log.change, 0),
+                units_in + max(log.change, 0),
+                request_count + (1 if log.request_id else 0),
+            )
+
+        if len(totals) > 1:
+            totals = cls._add_totals_in_bulk(totals)
+
+        for (item_id, day), (units_out, units_in, request_count) in totals.items():
+            increments = {
+                'units_out': models.F('units_out') + units_out,
+                'units_in': models.F('units_in') + units_in,
+                'request_count': models.F('request_count') + request_count,
+            }
+            rollup = cls.objects.filter(item_id=item_id, day=day)
+            if rollup.update(**increments):
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        item_id=item_id, day=day,
+                        units_out=units_out, units_in=units_in, request_count=request_count
+                    )
+            except IntegrityError:
+                # Another transaction created the row first; add to it instead
+                rollup.update(**increments)
+
+    @classmethod
+    def _add_totals_in_bulk(cls, totals):
+        """
+        Adds the totals to the existing rollup rows with one bulk_update of F() increments
+        and inserts the missing rows in one bulk_create. Returns the groups still to be
+        added, i.e. all of the new ones if another transaction inserted one of them first.
+        """
+        totals = dict(totals)
+        rows = [
+            row for row in cls.objects.filter(
+                item_id__in={item_id for item_id, _ in totals}, day__in={day for _, day in totals}
+            ).only('id', 'item_id', 'day')
+            if (row.item_id, row.day) in totals
+        ]
+        for row in rows:
+            units_out, units_in, request_count = totals.pop((row.item_id, row.day))
+            row.units_out = models.F('units_out') + units_out
+            row.units_in = models.F('units_in') + units_in
+            row.request_count = models.F('request_count') + request_count
+        cls.objects.bulk_update(rows, ['units_out', 'units_in', 'request_count'])
+
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create([
+                    cls(item_id=item_id, day=day, units_out=units_out, units_in=units_in, request_count=request_count)
+                    for (item_id, day), (units_out, units_in, request_count) in totals.items()
+                ])
+        except IntegrityError:
+            return totals   # Raced with another writer; add group by group instead
+        return {}
+
     def __str__(self):
-        return f"{self.item.name} @ {self.timestamp.strftime('%Y-%m-%d %H:%M')}: {self.change:+} -> {self.quantity_after_change} ({self.reason})"
\ No newline at end of file
+        return f"{self.item_id} on {self.day}: -{self.units_out} / +{self.units_in}"
@@ -1,16 +1,17 @@
 from rest_framework import serializers
-from .models import Category, InventoryItem, TeacherInventoryItem, StockLog
+from .models import Category, InventoryItem, TeacherInventoryItem, DailyStockUsage, as_date
 from django.contrib.auth import get_user_model
 from django.db.models import Sum
+from stationerySystem.serializers import SparseFieldsetMixin, TimedSerializerMixin
 
 User = get_user_model()
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'is_custom']
 
-class InventoryItemSerializer(serializers.ModelSerializer):
+class InventoryItemSerializer(SparseFieldsetMixin, TimedSerializerMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(),
@@ -27,7 +28,25 @@ class InventoryItemSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['status', 'created_at', 'updated_at']
 
-class TeacherInventorySerializer(serializers.ModelSerializer):
+    def get_acting_user(self):
+        # User recorded in the stock ledger (None for anonymous requests)
+        request = self.context.get('request')
+        if request and request.user.is_authenticated:
+            return request.user
+        return None
+
+    def create(self, validated_data):
+        item = InventoryItem(**validated_data)
+        item.save(changed_by=self.get_acting_user())   # Logs the initial count
+        return item
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(changed_by=self.get_acting_user())   # Logs any quantity change
+        return instance
+
+class TeacherInventorySerializer(SparseFieldsetMixin, TimedSerializerMixin, serializers.ModelSerializer):
     name = serializers.CharField(required=True, write_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(),
@@ -35,7 +54,7 @@ class TeacherInventorySerializer(serializers.ModelSerializer):
         required=True
     )
     quantity = serializers.IntegerField(required=True, min_value=0)
-    low_stock_threshold = serializers.IntegerField(required=True, min_value=0)
+    low_stock_threshold = serializers.IntegerField(required=True, min_value=0, write_only=True)  # Stored on the item
     status = serializers.CharField(read_only=True)
     
     class Meta:
@@ -65,13 +84,13 @@ class TeacherInventorySerializer(serializers.ModelSerializer):
         if request.user.role != 'teacher':
             raise serializers.ValidationError("Only teachers can create inventory items")
 
-        inventory_item = InventoryItem.objects.create(
+        inventory_item = InventoryItem(
             name=validated_data.pop('name'),
             category=validated_data.pop('category_id'),
             quantity=validated_data.pop('quantity'),
-            low_stock_threshold=validated_data.pop('low_stock_threshold'),
-            created_by=request.user
+            low_stock_threshold=validated_data.pop('low_stock_threshold')
         )
+        inventory_item.save(changed_by=request.user)    # Logs the initial count against the teacher
 
         teacher_inventory = TeacherInventoryItem.objects.create(
             item=inventory_item,
@@ -83,6 +102,8 @@ class TeacherInventorySerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
+        if 'item' not in self.fields:
+            return data
         data['item'] = {
             'id': instance.item.id,
             'name': instance.item.name,
@@ -98,7 +119,7 @@ class TeacherInventorySerializer(serializers.ModelSerializer):
         return data
     
 # New serializer for stock report
-class StockReportSerializer(serializers.ModelSerializer):
+class StockReportSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     usage = serializers.SerializerMethodField()
     status = serializers.CharField()
 
@@ -107,13 +128,16 @@ class StockReportSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'quantity', 'usage', 'status']
 
     def get_usage(self, obj):
-        # Calculate usage as sum of negative changes in StockLog
+        # Prefer the usage annotated by InventoryItem.objects.with_usage()
+        if hasattr(obj, 'usage_total'):
+            return abs(obj.usage_total)
+
+        # Fallback: sum the item's daily usage rollup for the requested dates
         start_date = self.context.get('start_date')
         end_date = self.context.get('end_date')
-        queryset = StockLog.objects.filter(item=obj, change__lt=0)
+        queryset = DailyStockUsage.objects.filter(item=obj)
         if start_date:
-            queryset = queryset.filter(timestamp__gte=start_date)
+            queryset = queryset.filter(day__gte=as_date(start_date))
         if end_date:
-            queryset = queryset.filter(timestamp__lte=end_date)
-        total_usage = queryset.aggregate(total=Sum('change'))['total'] or 0
-        return abs(total_usage)  # Return positive value for usage
+            queryset = queryset.filter(day__lte=as_date(end_date))
+        return queryset.aggregate(total=Sum('units_out'))['total'] or 0
@@ -0,0 +1,288 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from stationerySystem.reference_cache import invalidate
+from .models import Category, InventoryItem, StockLog, DailyStockUsage
+
+# Business logic for changing stock levels, shared by every view/serializer that deducts stock.
+
+
+class InsufficientStockError(Exception):
+    """Raised when a deduction asks for more than the item has in stock."""
+
+    def __init__(self, item, requested):
+        self.item = item
+        self.requested = requested
+        super().__init__(
+            f"Not enough {item.name} in stock (requested {requested}, available {item.quantity})"
+        )
+
+
+def deduct_stock(item_id, quantity, changed_by=None, request=None, reason=''):
+    """
+    Atomically deducts `quantity` from an inventory item and logs the change.
+
+    The item row is locked with select_for_update, so concurrent approvals queue up
+    instead of overwriting each other's read-modify-write. InventoryItem.save writes the
+    StockLog row in the same transaction, so the ledger always matches the stored quantity.
+
+    Raises InventoryItem.DoesNotExist or InsufficientStockError; either rolls back the transaction.
+    """
+    with transaction.atomic():
+        item = InventoryItem.objects.select_for_update().get(pk=item_id)
+        if item.quantity < quantity:
+            raise InsufficientStockError(item, quantity)
+
+        item.quantity -= quantity
+        # Recomputes status, appends the StockLog row and fires the low-stock notification signals
+        item.save(
+            changed_by=changed_by,
+            request=request,
+            reason=reason or (f"Request #{request.id} Approved" if request else "Manual Update")
+        )
+    return item
+
+
+def deduct_stock_for_requests(requests, changed_by=None):
+    """
+    Deducts stock for many approved requests at once.
+
+    Every affected item is locked once, in primary-key order so concurrent bulk approvals
+    cannot deadlock. Quantities are aggregated per item in memory and written back with one
+    bulk_update, and the StockLog rows with one bulk_create (rolled up per item and day). Requests are filled in the given
+    order; any request the remaining stock cannot cover is left out.
+
+    Returns (fulfilled, insufficient): two lists of the requests passed in.
+    """
+    # Imported here: the notification signals module depends on the inventory models
+    from notifications.signals import notify_stock_changes
+
+    fulfilled, insufficient, logs = [], [], []
+    with transaction.atomic():
+        items = InventoryItem.objects.select_for_update().filter(
+            pk__in={request.item_id for request in requests}
+        ).order_by('pk')
+        items = {item.pk: item for item in items}
+
+        was_low = {}    # Low-stock state of each changed item before the deductions
+        for request in requests:
+            item = items[request.item_id]
+            if item.quantity < request.quantity:
+                insufficient.append(request)
+                continue
+
+            was_low.setdefault(item.pk, item.quantity <= item.low_stock_threshold)
+            item.quantity -= request.quantity
+            logs.append(StockLog(
+                item=item,
+                change=-request.quantity,
+                quantity_after_change=item.quantity,
+                changed_by=changed_by,
+                request=request,
+                reason=f"Request #{request.id} Approved"
+            ))
+            fulfilled.append(request)
+
+        changed = [items[pk] for pk in was_low]
+        now = timezone.now()
+        for item in changed:
+            item.update_status()
+            item.updated_at = now   # bulk_update does not apply auto_now
+        InventoryItem.objects.bulk_update(changed, ['quantity', 'status', 'updated_at'])
+        StockLog.objects.bulk_create(logs)
+        DailyStockUsage.add_logs(logs)
+
+        # bulk_update skips the save signals, so notify about the stock changes directly
+        notify_stock_changes([(item, was_low[item.pk]) for item in changed])
+        for item in changed:
+            item._previous_quantity = item.quantity
+
+    return fulfilled, insufficient
+
+
+# Bulk imports: 'add' adds the quantities to the stock (a delivery), 'set' replaces it (a stock count)
+IMPORT_MODES = ('add', 'set')
+IMPORT_BATCH_SIZE = 1000
+# Tries at writing an import whose new item names keep being created concurrently
+IMPORT_ATTEMPTS = 3
+
+
+def parse_count(value, field, problems, required=False):
+    """Non-negative whole number from a CSV cell or JSON value; None if absent and optional."""
+    if value is None or str(value).strip() == '':
+        if required:
+            problems.append(f"Missing {field}.")
+        return None
+    try:
+        count = int(str(value).strip())
+    except ValueError:
+        count = -1
+    if count < 0:
+        problems.append(f"{field} must be a whole number of 0 or more.")
+        return None
+    return count
+
+
+def validate_inventory_rows(rows, mode):
+    """
+    Returns (lines, errors). Lines are keyed by item name; repeated names are merged
+    (quantities add up in 'add' mode, the last line wins in 'set' mode). Errors are
+    {"row", "name", "errors"} entries with 1-based row numbers.
+    """
+    name_length = InventoryItem._meta.get_field('name').max_length
+    category_length = Category._meta.get_field('name').max_length
+    lines, errors = {}, []
+    for number, row in enumerate(rows, start=1):
+        problems = []
+        name = str(row.get('name') or '').strip()
+        category = str(row.get('category') or '').strip()
+        if not name:
+            problems.append("Missing name.")
+        elif len(name) > name_length:
+            problems.append(f"name is longer than {name_length} characters.")
+        if not category:
+            problems.append("Missing category.")
+        elif len(category) > category_length:
+            problems.append(f"category is longer than {category_length} characters.")
+        quantity = parse_count(row.get('quantity'), 'quantity', problems, required=True)
+        threshold = parse_count(row.get('low_stock_threshold'), 'low_stock_threshold', problems)
+
+        if problems:
+            errors.append({'row': number, 'name': name, 'errors': problems})
+            continue
+
+        line = lines.setdefault(name, {'quantity': 0, 'low_stock_threshold': None})
+        line['quantity'] = line['quantity'] + quantity if mode == 'add' else quantity
+        line['category'] = category
+        if threshold is not None:
+            line['low_stock_threshold'] = threshold
+    return lines, errors
+
+
+def get_or_create_categories(names):
+    """Categories by name, creating the missing ones (as custom categories) in one insert."""
+    categories = Category.objects.in_bulk(names, field_name='name')
+    missing = [name for name in names if name not in categories]
+    if missing:
+        Category.objects.bulk_create([Category(name=name, is_custom=True) for name in missing], ignore_conflicts=True)
+        categories.update(Category.objects.in_bulk(missing, field_name='name'))
+        # bulk_create skips the signals that keep the cached category list current
+        invalidate('categories')
+    return categories
+
+
+def locked_items(names):
+    """Existing items with these names, locked for the rest of the transaction."""
+    return {
+        item.name: item
+        for item in InventoryItem.objects.select_for_update().filter(name__in=names).order_by('pk')
+    }
+
+
+def write_import_lines(lines, categories, mode):
+    """
+    Applies the import lines to the locked existing items and inserts the new ones.
+    Returns (written, created names, stock changes as (item, change, was_low)).
+
+    New names are inserted with a plain INSERT, so a name another transaction created since
+    the lock/read raises IntegrityError instead of having its stock overwritten.
+    """
+    existing = locked_items(lines)
+    now = timezone.now()
+    written, created, stock_changes = [], set(), []
+    for name, line in lines.items():
+        item = existing.get(name)
+        if item is None:
+            item = InventoryItem(name=name, quantity=0)
+            created.add(name)
+            before = None
+        else:
+            before = (item.category_id, item.quantity, item.low_stock_threshold)
+        was_low = item.quantity <= item.low_stock_threshold
+        previous_quantity = item.quantity
+
+        item.category = categories[line['category']]
+        item.quantity = item.quantity + line['quantity'] if mode == 'add' else line['quantity']
+        if line['low_stock_threshold'] is not None:
+            item.low_stock_threshold = line['low_stock_threshold']
+        if before == (item.category_id, item.quantity, item.low_stock_threshold):
+            continue    # Nothing to write for this line
+
+        item.update_status()
+        item.updated_at = now
+        written.append(item)
+        if item.quantity != previous_quantity:
+            stock_changes.append((item, item.quantity - previous_quantity, was_low))
+
+    InventoryItem.objects.bulk_update(
+        [item for item in written if item.name not in created],
+        ['category', 'quantity', 'low_stock_threshold', 'status', 'updated_at'],
+        batch_size=IMPORT_BATCH_SIZE,
+    )
+    InventoryItem.objects.bulk_create(
+        [item for item in written if item.name in created], batch_size=IMPORT_BATCH_SIZE
+    )
+    return written, created, stock_changes
+
+
+def import_inventory(rows, mode='add', changed_by=None, reason='', dry_run=False):
+    """
+    Creates or updates inventory items from import rows (name, category, quantity and
+    optionally low_stock_threshold), keyed on the unique item name.
+
+    Existing items are locked and read in one query, categories are resolved (and
+    created) in bulk, existing items are written with one bulk update and new ones with
+    one bulk insert, with their status recomputed. If another transaction creates one of
+    the new names meanwhile, the insert fails and the import is re-read and retried, so
+    that item's stock is added to rather than overwritten. Every quantity change gets a
+    StockLog row, written in one bulk insert, and the low-stock notifications for the
+    whole import are queued once, so they are sent as one batch on commit. Invalid rows
+    are skipped and reported.
+
+    Returns {"created", "updated", "errors"}.
+    """
+    # Imported here: the notification signals module depends on the inventory models
+    from notifications.signals import notify_stock_changes
+
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode '{mode}', use one of {', '.join(IMPORT_MODES)}.")
+    lines, errors = validate_inventory_rows(rows, mode)
+    if dry_run or not lines:
+        return {'created': [], 'updated': [], 'errors': errors}
+
+    with transaction.atomic():
+        categories = get_or_create_categories({line['category'] for line in lines.values()})
+        for attempt in range(1, IMPORT_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    written, created, stock_changes = write_import_lines(lines, categories, mode)
+                break
+            except IntegrityError:
+                # A new name was inserted concurrently; it is locked and updated on the next attempt
+                if attempt == IMPORT_ATTEMPTS:
+                    raise
+
+        logs = [
+            StockLog(
+                item=item,
+                change=change,
+                quantity_after_change=item.quantity,
+                changed_by=changed_by,
+                reason='Initial Count' if item.name in created else reason or ('Restock' if change > 0 else 'Manual Update')
+            )
+            for item, change, _ in stock_changes
+        ]
+        StockLog.objects.bulk_create(logs, batch_size=IMPORT_BATCH_SIZE)
+        DailyStockUsage.add_logs(logs)
+
+        # bulk writes skip the save signals; as with single saves, only existing items raise alerts
+        notify_stock_changes([(item, was_low) for item, _, was_low in stock_changes if item.name not in created])
+        for item in written:
+            item._previous_quantity = item.quantity
+            item._previous_low_stock_threshold = item.low_stock_threshold
+
+    summary = lambda item: {'id': item.id, 'name': item.name, 'quantity': item.quantity, 'status': item.status}
+    return {
+        'created': [summary(item) for item in written if item.name in created],
+        'updated': [summary(item) for item in written if item.name not in created],
+        'errors': errors,
+    }
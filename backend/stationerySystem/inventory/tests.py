@@ -1,3 +1,313 @@
-from django.test import TestCase
+import os
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+from notifications.models import Notification
+from users.models import User
+from .models import Category, InventoryItem, StockLog, DailyStockUsage
+from .services import deduct_stock, locked_items, InsufficientStockError
 
-# Create your tests here.
+
+class DeductStockTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Pens')
+        self.item = InventoryItem.objects.create(name='Pen', category=self.category, quantity=10)
+
+    def test_deduction_updates_quantity_status_and_ledger(self):
+        item = deduct_stock(self.item.pk, 6)
+        self.assertEqual(item.quantity, 4)
+        self.assertEqual(item.status, 'low_stock')
+        log = StockLog.objects.get(item=self.item, change__lt=0)
+        self.assertEqual((log.change, log.quantity_after_change), (-6, 4))
+
+    def test_over_deduction_is_rejected(self):
+        with self.assertRaises(InsufficientStockError):
+            deduct_stock(self.item.pk, 11)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 10)
+        self.assertFalse(StockLog.objects.filter(change__lt=0).exists())
+
+    def test_deduct_endpoint(self):
+        url = f'/api/inventory/inventory/items/{self.item.pk}/deduct/'
+        response = self.client.post(url, {'quantity': 3}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['quantity'], 7)
+        response = self.client.post(url, {'quantity': 30}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(url, {'quantity': 0}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentDeductStockTests(TransactionTestCase):
+    def test_concurrent_deductions_do_not_lose_updates(self):
+        category = Category.objects.create(name='Paper')
+        item = InventoryItem.objects.create(name='A4 Paper', category=category, quantity=20)
+        outcomes = []
+        start = threading.Barrier(30)
+
+        def worker():
+            try:
+                start.wait()
+                deduct_stock(item.pk, 1)
+                outcomes.append('ok')
+            except InsufficientStockError:
+                outcomes.append('insufficient')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(30)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        item.refresh_from_db()
+        self.assertEqual(outcomes.count('ok'), 20)
+        self.assertEqual(outcomes.count('insufficient'), 10)
+        self.assertEqual(item.quantity, 0)
+        self.assertEqual(StockLog.objects.filter(item=item, change=-1).count(), 20)
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Pens')
+
+    def test_every_quantity_change_is_logged(self):
+        item = InventoryItem.objects.create(name='Pen', category=self.category, quantity=10)
+        item.quantity = 25
+        item.save()
+        item.low_stock_threshold = 3
+        item.save()     # No quantity change, so no ledger row
+
+        self.assertEqual(
+            list(StockLog.objects.filter(item=item).order_by('id').values_list('change', 'quantity_after_change', 'reason')),
+            [(10, 10, 'Initial Count'), (15, 25, 'Restock')]
+        )
+
+    def test_manual_update_through_api_records_the_change(self):
+        item = InventoryItem.objects.create(name='Pen', category=self.category, quantity=10)
+        response = self.client.put(
+            f'/api/inventory/inventory/{item.pk}/',
+            {'name': 'Pen', 'category_id': self.category.pk, 'quantity': 4, 'low_stock_threshold': 5},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        log = StockLog.objects.filter(item=item).latest('id')
+        self.assertEqual((log.change, log.quantity_after_change), (-6, 4))
+
+
+class DailyStockUsageTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Pens')
+        self.item = InventoryItem.objects.create(name='Pen', category=self.category, quantity=10)
+
+    def test_rollup_tracks_ledger_writes(self):
+        deduct_stock(self.item.pk, 3)
+        deduct_stock(self.item.pk, 2)
+        self.item.refresh_from_db()
+        self.item.quantity += 4
+        self.item.save()
+
+        usage = DailyStockUsage.objects.get(item=self.item)
+        self.assertEqual((usage.units_out, usage.units_in, usage.request_count), (5, 14, 0))
+
+    def test_rebuild_matches_incremental_rollup(self):
+        deduct_stock(self.item.pk, 3)
+        expected = list(DailyStockUsage.objects.values_list('item', 'day', 'units_out', 'units_in'))
+        DailyStockUsage.objects.all().delete()
+
+        call_command('rebuild_stock_usage', stdout=StringIO())
+        self.assertEqual(
+            list(DailyStockUsage.objects.values_list('item', 'day', 'units_out', 'units_in')), expected
+        )
+
+
+class CategoryCacheTests(TestCase):
+    url = '/api/inventory/categories/'
+
+    def setUp(self):
+        cache.clear()
+        Category.objects.create(name='Pens')
+
+    def test_list_is_cached_with_etag_until_a_category_changes(self):
+        first = self.client.get(self.url)
+        etag = first['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(cached.json(), first.json())
+        self.assertEqual(not_modified.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Paper')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual({c['name'] for c in response.json()}, {'Pens', 'Paper'})
+
+    def test_etag_is_the_same_in_every_worker(self):
+        etag = self.client.get(self.url)['ETag']
+        cache.clear()   # A fresh worker, or the cached payload expiring
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+
+class InventoryListConditionalTests(TestCase):
+    url = '/api/inventory/inventory/'
+
+    def setUp(self):
+        cache.clear()
+        self.item = InventoryItem.objects.create(name='Pen', category=Category.objects.create(name='Pens'), quantity=10)
+
+    def test_unchanged_list_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 1)   # Only the aggregate
+
+        deduct_stock(self.item.pk, 1)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertNotEqual(self.client.get(self.url + '?status=low_stock')['ETag'], etag)
+
+    def test_etag_survives_another_worker_or_expired_cache(self):
+        etag = self.client.get(self.url)['ETag']
+        cache.clear()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_deleting_a_row_is_not_hidden_by_if_modified_since(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('Last-Modified', response)
+        self.item.delete()
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentImportTests(TransactionTestCase):
+    def test_item_created_meanwhile_gets_the_delivery_added(self):
+        manager = User.objects.create_user(email='manager@school.test', password='pass', role='stock_manager')
+        category = Category.objects.create(name='Office')
+
+        def create_elsewhere():
+            try:
+                InventoryItem.objects.create(name='Glue', category=category, quantity=7)
+            finally:
+                connection.close()
+
+        def read_then_race(names):
+            # Another transaction commits the same name after this import looked for it
+            existing = locked_items(names)
+            if not InventoryItem.objects.filter(name='Glue').exists():
+                thread = threading.Thread(target=create_elsewhere)
+                thread.start()
+                thread.join()
+            return existing
+
+        with mock.patch('inventory.services.locked_items', side_effect=read_then_race):
+            response = self.client.post(
+                '/api/inventory/inventory/import/', [{'name': 'Glue', 'category': 'Office', 'quantity': 4}],
+                content_type='application/json',
+                HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(manager).access_token}'
+            )
+        self.assertEqual(response.status_code, 201)
+        glue = InventoryItem.objects.get(name='Glue')
+        self.assertEqual(glue.quantity, 11)
+        log = StockLog.objects.filter(item=glue).latest('pk')
+        self.assertEqual((log.change, log.quantity_after_change, log.reason), (4, 11, 'Restock'))
+
+
+class InventoryImportTests(TestCase):
+    url = '/api/inventory/inventory/import/'
+
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(email='manager@school.test', password='pass', role='stock_manager')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.manager).access_token}'}
+        self.category = Category.objects.create(name='Pens')
+        self.pen = InventoryItem.objects.create(name='Pen', category=self.category, quantity=20, low_stock_threshold=5)
+
+    def post(self, rows, query=''):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url + query, rows, content_type='application/json', **self.auth)
+
+    def test_delivery_adds_stock_and_creates_items_and_categories(self):
+        response = self.post([
+            {'name': 'Pen', 'category': 'Pens', 'quantity': 10},
+            {'name': 'Stapler', 'category': 'Office', 'quantity': 3, 'low_stock_threshold': 2},
+            {'name': 'Pen', 'category': 'Pens', 'quantity': 5},
+            {'name': '', 'category': 'Pens', 'quantity': 'many'},
+        ])
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual([item['name'] for item in data['created']], ['Stapler'])
+        self.assertEqual(data['updated'][0]['quantity'], 35)
+        self.assertEqual(data['errors'][0]['row'], 4)
+
+        stapler = InventoryItem.objects.get(name='Stapler')
+        self.assertEqual((stapler.category.name, stapler.status), ('Office', 'in_stock'))
+        self.assertTrue(stapler.category.is_custom)
+        log = StockLog.objects.get(item=self.pen, reason='Restock')
+        self.assertEqual((log.change, log.quantity_after_change, log.changed_by), (15, 35, self.manager))
+        self.assertEqual(DailyStockUsage.objects.get(item=self.pen).units_in, 35)
+
+    def test_import_uses_a_fixed_number_of_queries(self):
+        def run(count):
+            rows = [{'name': f'Item {count}-{i}', 'category': f'Cat {count}-{i % 3}', 'quantity': i} for i in range(count)]
+            rows += [{'name': 'Pen', 'category': 'Pens', 'quantity': 1}]
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.post(rows).status_code, 201)
+            return len(queries)
+
+        run(3)  # Warms the auth user cache
+        self.assertEqual(run(5), run(50))
+
+    def test_stock_count_sends_one_batch_of_low_stock_alerts(self):
+        InventoryItem.objects.create(name='Ruler', category=self.category, quantity=30, low_stock_threshold=5)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post([
+                {'name': 'Pen', 'category': 'Pens', 'quantity': 2},
+                {'name': 'Ruler', 'category': 'Pens', 'quantity': 0},
+            ], query='?mode=set')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            set(Notification.objects.filter(recipient=self.manager).values_list('object_id', flat=True)),
+            {self.pen.id, InventoryItem.objects.get(name='Ruler').id}
+        )
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT INTO "notifications_notification"')]), 1)
+        self.pen.refresh_from_db()
+        self.assertEqual((self.pen.quantity, self.pen.status), (2, 'low_stock'))
+
+    def test_dry_run_and_permissions(self):
+        response = self.post([{'name': 'Glue', 'category': 'Pens', 'quantity': 4}], query='?dry_run=true')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(InventoryItem.objects.filter(name='Glue').exists())
+
+        teacher = User.objects.create_user(email='t@school.test', password='pass', role='teacher')
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(teacher).access_token}'}
+        response = self.client.post(self.url, [], content_type='application/json', **auth)
+        self.assertEqual(response.status_code, 403)
+
+    def test_command_imports_csv(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as source:
+            source.write('name,category,quantity,low_stock_threshold\n')
+            source.write('Pen,Pens,5,\n')
+            source.write('Marker,Pens,12,3\n')
+        self.addCleanup(os.remove, source.name)
+
+        call_command('import_inventory', source.name, reason='Delivery #12', stdout=StringIO())
+        self.pen.refresh_from_db()
+        self.assertEqual(self.pen.quantity, 25)
+        self.assertEqual(StockLog.objects.get(item=self.pen, change=5).reason, 'Delivery #12')
+        self.assertEqual(InventoryItem.objects.get(name='Marker').low_stock_threshold, 3)
@@ -5,7 +5,8 @@ from .api import (
     InventoryItemDetailView,
     TeacherInventoryView,
     TeacherInventoryDetailView,
-    InventoryDeductView
+    InventoryDeductView,
+    InventoryImportView
 )
 
 urlpatterns = [
@@ -19,6 +20,9 @@ urlpatterns = [
     # View all inventory items or add new ones
     path('inventory/', InventoryItemView.as_view(), name='inventory-list'),
 
+    # Create or update many items at once from a CSV/JSON delivery note or stock count
+    path('inventory/import/', InventoryImportView.as_view(), name='inventory-import'),
+
     # Retrieve, update, or delete a specific inventory item by ID
     path('inventory/<int:pk>/', InventoryItemDetailView.as_view(), name='inventory-detail'),
 
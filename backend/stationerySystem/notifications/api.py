@@ -1,15 +1,67 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import viewsets, status
+from users.authentication import CachedJWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
 from rest_framework.decorators import action # Allows custom endpoints
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from django.contrib.contenttypes.models import ContentType # Used for dynamic linking to other models
+from django.contrib.contenttypes.prefetch import GenericPrefetch
 from django.db.models import Q
 from .models import Notification
+from inventory.models import InventoryItem, TeacherInventoryItem
+from requests.models import Request
 from .serializers import NotificationSerializer
+from .counters import get_unread_count, adjust_unread_count
+from .broker import get_broker
+from stationerySystem.pagination import keyset_feed
+from stationerySystem.reference_cache import get_content_type_id
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Seconds between keep-alive comments on an idle notification stream
+STREAM_HEARTBEAT_SECONDS = 15
+
+def with_content_objects(queryset):
+    """
+    Resolves every row's generic content_object in bulk: one query per content type,
+    with the relations each model's __str__ reads (used as the display text) joined in.
+    """
+    return queryset.prefetch_related(GenericPrefetch('content_object', [
+        InventoryItem.objects.select_related('category'),
+        TeacherInventoryItem.objects.select_related('teacher', 'item'),
+        Request.objects.select_related('item'),
+    ]))
+
+
+def notifications_for(user):
+    """
+    Returns notifications relevant to the user's role, newest first.
+    Teachers only see REQUEST_STATUS or LOW_STOCK.
+    Managers/Admins see NEW_REQUEST or LOW_STOCK.
+    """
+    queryset = with_content_objects(
+        Notification.objects.select_related('recipient', 'content_type')
+    ).filter(recipient=user)
+
+    # Conditional query filtering based on user role
+    if user.role == 'teacher':
+        queryset = queryset.filter(
+            Q(notification_type=Notification.NotificationType.REQUEST_STATUS) |
+            Q(notification_type=Notification.NotificationType.LOW_STOCK)
+        )
+    elif user.role in ['stock_manager', 'admin']:
+        queryset = queryset.filter(
+            Q(notification_type=Notification.NotificationType.NEW_REQUEST) |
+            Q(notification_type=Notification.NotificationType.LOW_STOCK)
+        )
+
+    return queryset.order_by('-timestamp')
+
+
 class NotificationViewSet(viewsets.ModelViewSet):
     """
     Handles viewing, creating, and updating user notifications.
@@ -20,33 +72,11 @@ class NotificationViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']   # Restricts HTTP methods (excludes PUT)
 
     def get_queryset(self):
-        """
-        Returns notifications relevant to the current user's role.
-        Teachers only see REQUEST_STATUS or LOW_STOCK.
-        Managers/Admins see NEW_REQUEST or LOW_STOCK.
-        """
         user = self.request.user
-        queryset = Notification.objects.select_related('recipient', 'content_type')
-
         if not user.is_authenticated:
             # In development, return all notifications if unauthenticated
-            return Notification.objects.all()
-        
-        queryset = queryset.filter(recipient=user)
-        
-         # Conditional query filtering based on user role
-        if user.role == 'teacher':
-            queryset = queryset.filter(
-                Q(notification_type=Notification.NotificationType.REQUEST_STATUS) |
-                Q(notification_type=Notification.NotificationType.LOW_STOCK)
-            )
-        elif user.role in ['stock_manager', 'admin']:
-            queryset = queryset.filter(
-                Q(notification_type=Notification.NotificationType.NEW_REQUEST) |
-                Q(notification_type=Notification.NotificationType.LOW_STOCK)
-            )
-        
-        return queryset.order_by('-timestamp')
+            return with_content_objects(Notification.objects.select_related('recipient', 'content_type'))
+        return notifications_for(user)
 
     def create(self, request, *args, **kwargs):
         """
@@ -74,12 +104,25 @@ class NotificationViewSet(viewsets.ModelViewSet):
         if 'recipient' not in data:
             data['recipient'] = user.id
         
+        # recipient and content_type are not serializer fields, so they are passed to save()
+        try:
+            recipient_id = int(data['recipient'])
+        except (TypeError, ValueError):
+            recipient_id = None
+        if recipient_id is None or not User.objects.filter(pk=recipient_id).exists():
+            return Response(
+                {"error": "Invalid recipient"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        linked = {}
+
         # Handle optional generic linking to content object
         if 'content_type' in data and 'object_id' in data:
-            try:
-                content_type = ContentType.objects.get(model=data['content_type'])
-                data['content_type'] = content_type.id
-            except ContentType.DoesNotExist:
+            content_type_id = get_content_type_id(data['content_type'])
+            if content_type_id is not None:
+                data['content_type'] = content_type_id
+                linked['content_type_id'] = content_type_id
+            else:
                 return Response(
                     {"error": "Invalid content type"},
                     status=status.HTTP_400_BAD_REQUEST
@@ -87,7 +130,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()   #Dynamic object persistence based on model context
+        serializer.save(recipient_id=recipient_id, **linked)   #Dynamic object persistence based on model context
         
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
@@ -101,8 +144,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
         if not user.is_authenticated:
             return Response({"count": 0})
         
-        count = Notification.objects.filter(recipient=user, is_read=False).count()
-        return Response({"count": count})
+        # Served from the cache; the dispatcher and the mark-read actions keep it current
+        return Response({"count": get_unread_count(user.id)})
 
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
@@ -110,8 +153,9 @@ class NotificationViewSet(viewsets.ModelViewSet):
         Mark a single notification as read.
         """
         notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        # Only an actual unread -> read transition changes the counter
+        updated = Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True)
+        adjust_unread_count(notification.recipient_id, -updated)
         return Response({"status": "success"})
 
     @action(detail=False, methods=['post'])
@@ -124,8 +168,30 @@ class NotificationViewSet(viewsets.ModelViewSet):
             return Response({"status": "success", "marked_read": 0})
         
         updated = Notification.objects.filter(recipient=user, is_read=False).update(is_read=True)
+        adjust_unread_count(user.id, -updated)
         return Response({"status": "success", "marked_read": updated})
 
+    @action(detail=False, methods=['get'])
+    def feed(self, request):
+        """
+        Incremental feed: ?since=<latest> returns only notifications added after the
+        client's last poll, ?before=<oldest> pages back through history.
+        """
+        rows, meta = keyset_feed(self.get_queryset(), request.query_params, 'timestamp')
+        return Response({**meta, 'results': self.get_serializer(rows, many=True).data})
+
+    def perform_update(self, serializer):
+        """
+        Keeps the cached unread counts in step when a PATCH flips is_read or moves a notification.
+        """
+        before = (serializer.instance.recipient_id, serializer.instance.is_read)
+        notification = serializer.save()
+        if before != (notification.recipient_id, notification.is_read):
+            if not before[1]:
+                adjust_unread_count(before[0], -1)
+            if not notification.is_read:
+                adjust_unread_count(notification.recipient_id, 1)
+
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """
@@ -146,4 +212,59 @@ class NotificationViewSet(viewsets.ModelViewSet):
         return Response(
             {"error": "You can only delete your own notifications"},
             status=status.HTTP_403_FORBIDDEN
-        )
\ No newline at end of file
+        )
+
+
+# ---------------------
+# LIVE NOTIFICATION STREAM
+# ---------------------
+# Server-Sent Events: one long-lived response per dashboard instead of polling.
+# Needs the ASGI application (stationerySystem/asgi.py); a WSGI worker would be held per client.
+
+async def authenticate_stream(request):
+    """
+    Resolves the user from a JWT access token. EventSource cannot set headers,
+    so the token may also be passed as ?token=...
+    """
+    authenticator = CachedJWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header else request.GET.get('token', '').encode()
+    if not raw_token:
+        return None
+    try:
+        validated = authenticator.get_validated_token(raw_token)
+        return await sync_to_async(authenticator.get_user)(validated)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+async def notification_stream(request):
+    """
+    Streams the current user's notifications as they are committed.
+    Each event is JSON with the same keys as the list endpoint's basic fields.
+    """
+    user = await authenticate_stream(request)
+    if user is None:
+        return JsonResponse({"error": "Authentication required"}, status=status.HTTP_401_UNAUTHORIZED)
+
+    broker = get_broker()
+    queue = broker.subscribe(user.id)
+
+    async def events():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'    # Stops proxies closing an idle connection
+                    continue
+                yield f"id: {event['id']}\nevent: notification\ndata: {json.dumps(event)}\n\n"
+        finally:
+            # Runs when the client disconnects and the server cancels the stream
+            broker.unsubscribe(user.id, queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'    # Disable nginx response buffering
+    return response
@@ -14,3 +14,6 @@ class NotificationsConfig(AppConfig):
         Demonstrates the use of event-driven architecture using Django's built-in signals framework.
         """
         from . import signals
+        from django.contrib.contenttypes.models import ContentType
+        from stationerySystem.reference_cache import register
+        register('content_types', lambda: dict(ContentType.objects.values_list('model', 'id')), ContentType)
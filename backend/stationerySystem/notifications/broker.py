@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Events waiting for one slow subscriber before further events to it are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class InProcessBroker:
+    """
+    Fans committed notifications out to the SSE streams open in this process.
+
+    Subscribers are asyncio queues living on the server's event loop, while publish()
+    is called from the sync thread that committed the transaction, so delivery is
+    handed to each queue's loop with call_soon_threadsafe.
+
+    Only reaches clients connected to the same worker process; to push across
+    several workers, point NOTIFICATION_BROKER at a class with the same three
+    methods backed by a shared channel (e.g. Redis pub/sub).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)    # user id -> {(loop, queue)}
+
+    def subscribe(self, user_id):
+        """Registers a queue for the user. Must be called from the event loop that reads it."""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[user_id].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_deliver, queue, event)
+            except RuntimeError:
+                self.unsubscribe(user_id, queue)    # The loop has shut down
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+def _deliver(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        pass    # Client is not keeping up; it can catch up through the list endpoints
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """Returns the broker configured by NOTIFICATION_BROKER (in-process by default)."""
+    path = getattr(settings, 'NOTIFICATION_BROKER', 'notifications.broker.InProcessBroker')
+    return import_string(path)()
+
+
+def stream_event(notification):
+    """The data pushed for one notification; kept flat so publishing needs no queries."""
+    return {
+        'id': notification.id,
+        'notification_type': notification.notification_type,
+        'message': notification.message,
+        'is_read': notification.is_read,
+        'timestamp': notification.timestamp.isoformat(),
+        'object_id': notification.object_id,
+        'link': notification.link,
+    }
+
+
+def publish_notifications(notifications):
+    """Pushes committed notifications to their recipients' open streams."""
+    broker = get_broker()
+    for notification in notifications:
+        broker.publish(notification.recipient_id, stream_event(notification))
@@ -0,0 +1,48 @@
+from collections import Counter
+from django.core.cache import cache
+from .models import Notification
+
+# How long a cached unread count is trusted before it is recounted from the database.
+# Increments/decrements keep it current in between; expiry reconciles any drift.
+UNREAD_COUNT_TIMEOUT = 300
+
+
+def unread_count_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def get_unread_count(user_id):
+    """
+    Returns the user's unread notification count, from the cache when possible.
+    On a miss the count is taken from the database and cached for UNREAD_COUNT_TIMEOUT seconds.
+    """
+    key = unread_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        cache.add(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """
+    Applies a change to a cached count. A count that isn't cached is left alone,
+    the next read recounts it from the database anyway.
+    """
+    if not delta:
+        return
+    try:
+        cache.incr(unread_count_key(user_id), delta)
+    except ValueError:
+        pass    # Not cached (or expired)
+
+
+def invalidate_unread_count(user_id):
+    cache.delete(unread_count_key(user_id))
+
+
+def count_new_notifications(notifications):
+    """Adds freshly inserted notifications to their recipients' cached counts."""
+    per_recipient = Counter(n.recipient_id for n in notifications if not n.is_read)
+    for user_id, count in per_recipient.items():
+        adjust_unread_count(user_id, count)
@@ -0,0 +1,116 @@
+import logging
+from datetime import timedelta
+from functools import partial
+from django.conf import settings
+from django.db import connection, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+# Sent once per commit with the rows inserted (`notifications`) and the existing
+# alerts refreshed in place (`coalesced`), e.g. for counters or live feeds
+notifications_dispatched = Signal()
+
+# A new low-stock alert replaces the recipient's unread alert about the same item if that
+# one was raised (or last refreshed) within this window. Override with NOTIFICATION_COALESCE_WINDOW.
+DEFAULT_COALESCE_WINDOW = timedelta(hours=1)
+
+
+class NotificationDispatcher:
+    """
+    Collects notifications raised during a transaction and writes them
+    with a single bulk_create once the transaction commits.
+
+    Every queue() call registers its own on_commit hook, so batches queued inside a
+    savepoint that rolls back are dropped along with it. The first hook to run writes
+    its batch together with those of the hooks still waiting; the rest find theirs empty.
+
+    Outside a transaction (autocommit) each queue() call is flushed straight
+    away, which still turns a fan-out to many recipients into one INSERT.
+    """
+
+    def queue(self, notifications):
+        """
+        Adds unsaved Notification instances to the batch for the current transaction.
+        """
+        notifications = list(notifications)
+        if notifications:
+            transaction.on_commit(partial(self.flush, notifications))
+
+    def flush(self, batch):
+        """
+        Writes the batch and every batch still waiting to be committed in one statement
+        (plus one update for coalesced alerts). Returns the number of rows emitted.
+        """
+        batches = [batch] + [
+            func.args[0] for _, func, _ in connection.run_on_commit
+            if isinstance(func, partial) and func.func == self.flush and func.args[0] is not batch
+        ]
+        pending = [notification for queued in batches for notification in queued]
+        for queued in batches:
+            queued.clear()    # Written now, so their own hooks have nothing left to do
+        if not pending:
+            return 0
+
+        with transaction.atomic():
+            fresh, coalesced = self.coalesce(pending)
+            created = Notification.objects.bulk_create(fresh) if fresh else []
+        logger.info(
+            "Notification dispatcher emitted %d row(s) on commit (%d coalesced)", len(created), len(coalesced)
+        )
+        notifications_dispatched.send(sender=self.__class__, notifications=created, coalesced=coalesced)
+        return len(created) + len(coalesced)
+
+    def coalesce(self, notifications):
+        """
+        Folds repeated LOW_STOCK alerts into the recipient's existing unread alert for the item.
+
+        Within the batch the last alert per (recipient, item) wins; across batches, unread alerts
+        raised inside the coalescing window are refreshed in place with one bulk_update instead
+        of inserting another row. Returns (to_insert, updated_existing).
+        """
+        window = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', DEFAULT_COALESCE_WINDOW)
+        if not window:
+            return notifications, []
+
+        latest, others = {}, []
+        for notification in notifications:
+            if notification.notification_type == Notification.NotificationType.LOW_STOCK \
+                    and notification.object_id is not None:
+                key = (notification.recipient_id, notification.content_type_id, notification.object_id)
+                latest[key] = notification
+            else:
+                others.append(notification)
+        if not latest:
+            return others, []
+
+        now = timezone.now()
+        existing = {}
+        # Oldest first, so the newest matching alert ends up in the dict
+        for alert in Notification.objects.filter(
+            notification_type=Notification.NotificationType.LOW_STOCK,
+            is_read=False,
+            timestamp__gte=now - window,
+            recipient_id__in={key[0] for key in latest},
+            object_id__in={key[2] for key in latest},
+        ).order_by('timestamp', 'id'):
+            existing[(alert.recipient_id, alert.content_type_id, alert.object_id)] = alert
+
+        updated = []
+        for key, notification in latest.items():
+            alert = existing.get(key)
+            if alert is None:
+                others.append(notification)
+                continue
+            alert.message, alert.link, alert.timestamp = notification.message, notification.link, now
+            updated.append(alert)
+
+        if updated:
+            Notification.objects.bulk_update(updated, ['message', 'link', 'timestamp'])
+        return others, updated
+
+
+# Shared instance used by the signal handlers
+dispatcher = NotificationDispatcher()
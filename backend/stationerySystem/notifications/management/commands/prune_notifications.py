@@ -0,0 +1,89 @@
+import json
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from notifications.models import Notification
+
+# Read notifications older than this many days are removed by default
+DEFAULT_RETENTION_DAYS = 90
+
+ARCHIVE_FIELDS = (
+    'id', 'recipient_id', 'notification_type', 'message', 'is_read',
+    'timestamp', 'content_type_id', 'object_id', 'link',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Removes read notifications past the retention age and collapses repeated LOW_STOCK "
+        "alerts for the same item and recipient into the newest one. Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=DEFAULT_RETENTION_DAYS,
+                            help="Delete read notifications older than this many days")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows deleted per statement")
+        parser.add_argument('--archive', metavar='PATH',
+                            help="Append removed rows to this file as JSON lines before deleting them")
+        parser.add_argument('--skip-compaction', action='store_true',
+                            help="Only apply the retention age, keep duplicate LOW_STOCK alerts")
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['batch_size'] < 1:
+            raise CommandError("--days must be >= 0 and --batch-size >= 1")
+
+        started = time.monotonic()
+        archive = open(options['archive'], 'a') if options['archive'] else None
+        try:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+            expired = self.delete_in_batches(
+                Notification.objects.filter(is_read=True, timestamp__lt=cutoff),
+                options['batch_size'], archive
+            )
+            collapsed = 0
+            if not options['skip_compaction']:
+                collapsed = self.delete_in_batches(
+                    self.superseded_low_stock_alerts(), options['batch_size'], archive
+                )
+        finally:
+            if archive:
+                archive.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {expired} expired and {collapsed} duplicate low-stock notification(s) "
+            f"in {time.monotonic() - started:.2f}s."
+        ))
+
+    def superseded_low_stock_alerts(self):
+        """LOW_STOCK rows for which the same recipient has a newer alert about the same item."""
+        newer = Notification.objects.filter(
+            notification_type=Notification.NotificationType.LOW_STOCK,
+            recipient_id=OuterRef('recipient_id'),
+            content_type_id=OuterRef('content_type_id'),
+            object_id=OuterRef('object_id'),
+        ).filter(
+            Q(timestamp__gt=OuterRef('timestamp')) | Q(timestamp=OuterRef('timestamp'), id__gt=OuterRef('id'))
+        )
+        return Notification.objects.filter(
+            notification_type=Notification.NotificationType.LOW_STOCK,
+            object_id__isnull=False,
+        ).filter(Exists(newer))
+
+    def delete_in_batches(self, queryset, batch_size, archive):
+        """
+        Deletes the queryset's rows a batch at a time, each batch in its own short
+        transaction, so the table is never locked for the whole run.
+        """
+        removed = 0
+        while True:
+            rows = list(queryset.order_by('id').values(*ARCHIVE_FIELDS)[:batch_size])
+            if not rows:
+                return removed
+            if archive:
+                archive.writelines(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+            # Goes through the post_delete signal, which keeps the cached unread counts right
+            Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+            removed += len(rows)
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import resource
+import statistics
+import time
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+from notifications.broker import get_broker
+
+LOADTEST_EMAIL_DOMAIN = 'sse-loadtest.invalid'
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the notification stream: opens many concurrent SSE connections on the "
+        "ASGI application inside this one process, publishes events and reports push latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=1000, help="Concurrent open streams")
+        parser.add_argument('--users', type=int, default=50, help="Recipients the streams are spread over")
+        parser.add_argument('--events', type=int, default=10, help="Events published to every recipient")
+        parser.add_argument('--interval', type=float, default=0.1, help="Seconds between publish rounds")
+        parser.add_argument('--timeout', type=float, default=60, help="Seconds to wait for connections/deliveries")
+
+    def handle(self, *args, **options):
+        # Temporary recipients, removed again whatever happens
+        users = User.objects.bulk_create([
+            User(email=f'user{i}@{LOADTEST_EMAIL_DOMAIN}', role='teacher', password='!')
+            for i in range(options['users'])
+        ])
+        try:
+            tokens = {user.id: str(AccessToken.for_user(user)) for user in users}
+            results = asyncio.run(self.run(tokens, options))
+        finally:
+            User.objects.filter(email__endswith=f'@{LOADTEST_EMAIL_DOMAIN}').delete()
+        self.report(results, options)
+
+    async def run(self, tokens, options):
+        app = get_asgi_application()
+        broker = get_broker()
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        latencies, connect_times = [], []
+        user_ids = list(tokens)
+
+        async def subscriber(user_id):
+            started = loop.time()
+            sent_request = False
+
+            async def receive():
+                nonlocal sent_request
+                if not sent_request:
+                    sent_request = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await stop.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    if message['status'] != 200:
+                        raise RuntimeError(f"Stream refused with status {message['status']}")
+                    connect_times.append(loop.time() - started)
+                    return
+                for line in message.get('body', b'').decode().splitlines():
+                    if line.startswith('data: '):
+                        event = json.loads(line[len('data: '):])
+                        latencies.append(time.perf_counter() - event['sent_at'])
+
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http',
+                'path': '/api/notifications/stream/', 'raw_path': b'/api/notifications/stream/',
+                'query_string': f'token={tokens[user_id]}'.encode(),
+                'headers': [(b'host', b'localhost'), (b'accept', b'text/event-stream')],
+                'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+            }
+            await app(scope, receive, send)
+
+        tasks = [
+            asyncio.create_task(subscriber(user_ids[i % len(user_ids)]))
+            for i in range(options['subscribers'])
+        ]
+
+        connect_started = loop.time()
+        await self.wait_for(lambda: broker.subscriber_count() >= options['subscribers'], options['timeout'])
+        connect_elapsed = loop.time() - connect_started
+
+        def publish_round(round_number):
+            # Called from a worker thread, like the on_commit hook of a real request
+            for user_id in user_ids:
+                broker.publish(user_id, {'id': round_number, 'sent_at': time.perf_counter()})
+
+        expected = options['events'] * options['subscribers']
+        publish_started = loop.time()
+        for round_number in range(options['events']):
+            await asyncio.to_thread(publish_round, round_number)
+            await asyncio.sleep(options['interval'])
+        await self.wait_for(lambda: len(latencies) >= expected, options['timeout'])
+        publish_elapsed = loop.time() - publish_started
+
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return {
+            'connected': len(connect_times),
+            'connect_elapsed': connect_elapsed,
+            'expected': expected,
+            'latencies': latencies,
+            'publish_elapsed': publish_elapsed,
+        }
+
+    async def wait_for(self, condition, timeout):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+    def report(self, results, options):
+        latencies = sorted(results['latencies']) or [0]
+        percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        self.stdout.write(f"Subscribers connected: {results['connected']}/{options['subscribers']} "
+                          f"in {results['connect_elapsed']:.2f}s")
+        self.stdout.write(f"Events delivered:      {len(results['latencies'])}/{results['expected']} "
+                          f"in {results['publish_elapsed']:.2f}s")
+        self.stdout.write(f"Push latency (ms):     p50 {percentile(0.5):.1f}  p95 {percentile(0.95):.1f}  "
+                          f"p99 {percentile(0.99):.1f}  max {latencies[-1] * 1000:.1f}  "
+                          f"mean {statistics.mean(latencies) * 1000:.1f}")
+        self.stdout.write(f"Peak memory:           {peak_rss_mb:.0f} MB")
+
+        if results['connected'] == options['subscribers'] and len(results['latencies']) == results['expected']:
+            self.stdout.write(self.style.SUCCESS("All subscribers received every event."))
+        else:
+            self.stdout.write(self.style.WARNING("Some connections or events were lost; lower --subscribers."))
@@ -64,6 +64,8 @@ class Notification(models.Model):
         indexes = [
              # Optimize for unread-notifications lookup
             models.Index(fields=['recipient', 'is_read', '-timestamp']),
+            # Keyset feed: a recipient's notifications newest first, id breaking timestamp ties
+            models.Index(fields=['recipient', '-timestamp', '-id']),
         ]
 
     def __str__(self):
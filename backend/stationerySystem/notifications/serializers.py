@@ -2,6 +2,8 @@ from rest_framework import serializers
 from .models import Notification
 from django.contrib.contenttypes.models import ContentType
 from django.conf import settings
+from stationerySystem.reference_cache import get_content_type_id
+from stationerySystem.serializers import TimedSerializerMixin
 
 # Custom serializer for any generic related object (dynamic content reference)
 class ContentObjectSerializer(serializers.Serializer):
@@ -9,7 +11,7 @@ class ContentObjectSerializer(serializers.Serializer):
     type = serializers.CharField(source='_meta.model_name') # Uses model's name
     display = serializers.CharField(source='__str__')   # Uses model's string representation
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     # Dynamically return the related object data using SerializerMethodField
     content_object = serializers.SerializerMethodField()
 
@@ -39,6 +41,7 @@ class NotificationSerializer(serializers.ModelSerializer):
         """
         Returns serialized details of the related object (if it exists).
         Supports polymorphic relation through GenericForeignKey.
+        List views prefetch content_object in bulk (see api.with_content_objects).
         """
         if obj.content_object is None:
             return None
@@ -51,15 +54,15 @@ class NotificationSerializer(serializers.ModelSerializer):
         """
         # Advanced object lookup and validation logic
         if 'content_type' in data and 'object_id' in data:
-            try:
-                content_type = ContentType.objects.get(model=data['content_type'])
-                model_class = content_type.model_class()
-                if not model_class.objects.filter(id=data['object_id']).exists():
-                    raise serializers.ValidationError(
-                        {"object_id": "Referenced object does not exist"}
-                    )
-            except ContentType.DoesNotExist:
+            # Model name -> id comes from the reference data cache, id -> ContentType from Django's own cache
+            content_type_id = get_content_type_id(data['content_type'])
+            if content_type_id is None:
                 raise serializers.ValidationError(
                     {"content_type": "Invalid content type"}
                 )
+            model_class = ContentType.objects.get_for_id(content_type_id).model_class()
+            if not model_class.objects.filter(id=data['object_id']).exists():
+                raise serializers.ValidationError(
+                    {"object_id": "Referenced object does not exist"}
+                )
         return data
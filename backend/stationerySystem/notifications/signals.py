@@ -1,8 +1,12 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
-from django.db import transaction
+from django.db.models import F
 from .models import Notification
+from .dispatcher import dispatcher, notifications_dispatched
+from .counters import adjust_unread_count, count_new_notifications
+from .broker import publish_notifications
 from inventory.models import InventoryItem, TeacherInventoryItem
 from requests.models import Request
 from django.conf import settings
@@ -16,19 +20,19 @@ User = get_user_model()
 def check_inventory_changes(sender, instance, **kwargs):
     """
     Detects changes in inventory quantity before saving.
-    Stores original state to compare after saving.
+    Compares against the state captured in InventoryItem.from_db,
+    so no extra query is needed to fetch the original row.
     
     Custom logic triggers based on state comparison.
     """
-    if instance.pk:
-        try:
-            original = InventoryItem.objects.get(pk=instance.pk)
-            if original.quantity != instance.quantity:
-                instance._quantity_changed = True
-                instance._previous_quantity = original.quantity
-                instance._original_low_status = (original.quantity <= original.low_stock_threshold)
-        except InventoryItem.DoesNotExist:
-            pass
+    instance._quantity_changed = False
+    if instance.pk and instance._previous_quantity is not None:
+        if instance._previous_quantity != instance.quantity:
+            previous_threshold = instance._previous_low_stock_threshold
+            if previous_threshold is None:
+                previous_threshold = instance.low_stock_threshold
+            instance._quantity_changed = True
+            instance._original_low_status = (instance._previous_quantity <= previous_threshold)
 
 @receiver(post_save, sender=InventoryItem)
 def notify_inventory_changes(sender, instance, created, **kwargs):
@@ -39,56 +43,77 @@ def notify_inventory_changes(sender, instance, created, **kwargs):
     if created:
         # Optionally notify about new items being added
         pass
-    elif hasattr(instance, '_quantity_changed'):
+    elif getattr(instance, '_quantity_changed', False):
         # Stock level changed
-        current_low_status = (instance.quantity <= instance.low_stock_threshold)
-        
-        # Only notify if crossing the threshold in either direction
-        if (current_low_status and not getattr(instance, '_original_low_status', False)) or \
-           (not current_low_status and getattr(instance, '_original_low_status', False)):
-            notify_low_stock(instance)
-        
-        # Notify assigned teachers if their stock is affected
-        notify_teachers_about_stock_changes(instance)
-
-def notify_low_stock(item):
+        notify_stock_changes([(instance, getattr(instance, '_original_low_status', False))])
+
+    instance._quantity_changed = False
+
+def notify_stock_changes(changes):
+    """
+    Notifies users about items whose quantity changed.
+    `changes` is a list of (item, was_low) pairs, where was_low is the low-stock state before the change.
+    Also used directly by bulk updates, which bypass the save signals.
+    """
+    # Only notify managers if crossing the threshold in either direction
+    crossed = [
+        item for item, was_low in changes
+        if (item.quantity <= item.low_stock_threshold) != was_low
+    ]
+    if crossed:
+        notify_low_stock(*crossed)
+    
+    # Notify assigned teachers if their stock is affected
+    notify_teachers_about_stock_changes(*[item for item, _ in changes])
+
+def notify_low_stock(*items):
     """
     Sends low stock notifications to all stock managers.
-    Iterates through filtered user roles to dispatch messages.
+    Queues one notification per manager and item; they are written in a single batch on commit.
     """
-    stock_managers = User.objects.filter(role='stock_manager')
-    content_type = ContentType.objects.get_for_model(item)
+    manager_ids = list(User.objects.filter(role='stock_manager').values_list('id', flat=True))
+    content_type = ContentType.objects.get_for_model(InventoryItem)
 
-    for manager in stock_managers:
-        Notification.objects.create(
-            recipient=manager,
+    dispatcher.queue(
+        Notification(
+            recipient_id=manager_id,
             notification_type=Notification.NotificationType.LOW_STOCK,
             message=f"{item.name} is running low. Current quantity: {item.quantity} (Threshold: {item.low_stock_threshold})",
             content_type=content_type,
             object_id=item.id,
             link=f"/inventory/{item.id}"
         )
+        for item in items
+        for manager_id in manager_ids
+    )
 
-def notify_teachers_about_stock_changes(item):
+def notify_teachers_about_stock_changes(*items):
     """
     Notifies teachers if their assigned inventory item is low.
     """
-    teacher_assignments = TeacherInventoryItem.objects.filter(item=item)
-    content_type = ContentType.objects.get_for_model(item)
-
-    for assignment in teacher_assignments:
-        current_low_status = (assignment.quantity <= item.low_stock_threshold)
-        
-        # Check if we should notify this teacher
-        if current_low_status and assignment.quantity > 0:
-            Notification.objects.create(
-                recipient=assignment.teacher,
-                notification_type=Notification.NotificationType.LOW_STOCK,
-                message=f"Your assigned {item.name} is running low. Current quantity: {assignment.quantity}",
-                content_type=content_type,
-                object_id=item.id,
-                link=f"/teacher-inventory/{item.id}"
-            )
+    items_by_id = {item.id: item for item in items}
+    if not items_by_id:
+        return
+
+    # Only teachers whose assigned quantity is low (but not empty) are notified
+    teacher_assignments = TeacherInventoryItem.objects.filter(
+        item_id__in=items_by_id,
+        quantity__gt=0,
+        quantity__lte=F('item__low_stock_threshold')
+    ).values_list('item_id', 'teacher_id', 'quantity')
+    content_type = ContentType.objects.get_for_model(InventoryItem)
+
+    dispatcher.queue(
+        Notification(
+            recipient_id=teacher_id,
+            notification_type=Notification.NotificationType.LOW_STOCK,
+            message=f"Your assigned {items_by_id[item_id].name} is running low. Current quantity: {quantity}",
+            content_type=content_type,
+            object_id=item_id,
+            link=f"/teacher-inventory/{item_id}"
+        )
+        for item_id, teacher_id, quantity in teacher_assignments
+    )
 
 # === Request Notifications ===
 
@@ -102,43 +127,51 @@ def handle_request_notifications(sender, instance, created, **kwargs):
 
     if created:
         # New request notification for stock managers
-        stock_managers = User.objects.filter(role='stock_manager')
-        for manager in stock_managers:
-            Notification.objects.create(
-                recipient=manager,
-                notification_type=Notification.NotificationType.NEW_REQUEST,
-                message=f"New request for {instance.item.name} (Quantity: {instance.quantity})",
-                content_type=content_type,
-                object_id=instance.id,
-                link=f"/requests/{instance.id}"
-            )
-    else:
-        # Check if this is an update by fetching the original instance
-        try:
-            original = Request.objects.get(id=instance.id)
-            # Compare current status with the original status
-            if original.status != instance.status:
-                if instance.status == Request.APPROVED:
-                    Notification.objects.create(
-                        recipient=instance.user,
-                        notification_type=Notification.NotificationType.REQUEST_STATUS,
-                        message=f"Your request for {instance.quantity} {instance.item.name} has been approved",
-                        content_type=content_type,
-                        object_id=instance.id,
-                        link=f"/requests/{instance.id}"
-                    )
-                elif instance.status == Request.REJECTED:
-                    Notification.objects.create(
-                        recipient=instance.user,
-                        notification_type=Notification.NotificationType.REQUEST_STATUS,
-                        message=f"Your request for {instance.quantity} {instance.item.name} has been rejected",
-                        content_type=content_type,
-                        object_id=instance.id,
-                        link=f"/requests/{instance.id}"
-                    )
-        except Request.DoesNotExist:
-            # This shouldn't happen in post_save with created=False, but handle just in case
-            pass
+        notify_new_requests(instance)
+    # Compare current status with the status captured in Request.from_db
+    elif instance._previous_status is not None and instance._previous_status != instance.status:
+        notification = request_status_notification(instance, content_type)
+        if notification:
+            dispatcher.queue([notification])
+
+    instance._previous_status = instance.status
+
+def notify_new_requests(*requests):
+    """
+    Notifies every stock manager about newly created requests, queued as one batch.
+    """
+    manager_ids = list(User.objects.filter(role='stock_manager').values_list('id', flat=True))
+    content_type = ContentType.objects.get_for_model(Request)
+
+    dispatcher.queue(
+        Notification(
+            recipient_id=manager_id,
+            notification_type=Notification.NotificationType.NEW_REQUEST,
+            message=f"New request for {request_obj.item.name} (Quantity: {request_obj.quantity})",
+            content_type=content_type,
+            object_id=request_obj.id,
+            link=f"/requests/{request_obj.id}"
+        )
+        for request_obj in requests
+        for manager_id in manager_ids
+    )
+
+def request_status_notification(request_obj, content_type=None):
+    """
+    Builds (without saving) the notification telling a teacher their request was approved or rejected.
+    Returns None when there is nothing to send.
+    """
+    if request_obj.status not in (Request.APPROVED, Request.REJECTED) or not request_obj.user_id:
+        return None
+    verb = 'approved' if request_obj.status == Request.APPROVED else 'rejected'
+    return Notification(
+        recipient_id=request_obj.user_id,
+        notification_type=Notification.NotificationType.REQUEST_STATUS,
+        message=f"Your request for {request_obj.quantity} {request_obj.item.name} has been {verb}",
+        content_type=content_type or ContentType.objects.get_for_model(Request),
+        object_id=request_obj.id,
+        link=f"/requests/{request_obj.id}"
+    )
 
 # === Teacher Assignment Notifications ===
 
@@ -150,11 +183,54 @@ def notify_item_assignment(sender, instance, created, **kwargs):
     """
     if created:
         content_type = ContentType.objects.get_for_model(instance)
-        Notification.objects.create(
-            recipient=instance.teacher,
-            notification_type=Notification.NotificationType.REQUEST_STATUS,
-            message=f"You've been assigned {instance.quantity} {instance.item.name}",
-            content_type=content_type,
-            object_id=instance.id,
-            link=f"/teacher-inventory/{instance.id}"
-        )
\ No newline at end of file
+        dispatcher.queue([
+            Notification(
+                recipient_id=instance.teacher_id,
+                notification_type=Notification.NotificationType.REQUEST_STATUS,
+                message=f"You've been assigned {instance.quantity} {instance.item.name}",
+                content_type=content_type,
+                object_id=instance.id,
+                link=f"/teacher-inventory/{instance.id}"
+            )
+        ])
+
+
+# === Unread Counter Maintenance ===
+
+@receiver(notifications_dispatched)
+def count_dispatched_notifications(sender, notifications, **kwargs):
+    """
+    Adds each committed batch to the recipients' cached unread counts.
+    Runs after commit, so the counts never include rows that were rolled back.
+    """
+    count_new_notifications(notifications)
+
+
+@receiver(post_save, sender=Notification)
+def dispatch_saved_notification(sender, instance, created, **kwargs):
+    """Covers notifications saved one at a time instead of through the dispatcher."""
+    if created:
+        transaction.on_commit(lambda: announce_saved_notification(instance))
+
+
+def announce_saved_notification(notification):
+    if not notification.is_read:
+        adjust_unread_count(notification.recipient_id, 1)
+    publish_notifications([notification])
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        transaction.on_commit(lambda: adjust_unread_count(instance.recipient_id, -1))
+
+
+# === Live Push (Server-Sent Events) ===
+
+@receiver(notifications_dispatched)
+def push_dispatched_notifications(sender, notifications, coalesced=(), **kwargs):
+    """
+    Sends each committed batch to recipients with an open notification stream.
+    Refreshed alerts keep their id, so clients replace the entry they already show.
+    """
+    publish_notifications([*notifications, *coalesced])
@@ -1,3 +1,280 @@
+import asyncio
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, transaction
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.contrib.contenttypes.models import ContentType
+from inventory.models import Category, InventoryItem, TeacherInventoryItem
+from requests.models import Request
+from users.models import User
+from .models import Notification
+from .dispatcher import dispatcher
+from .counters import unread_count_key
+from .broker import get_broker
 
-# Create your tests here.
+
+class UnreadCountCacheTests(TestCase):
+    url = '/api/notifications/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='teacher@school.test', password='pass', role='teacher')
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def notify(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            dispatcher.queue(
+                Notification(recipient=self.user, message='Hi', notification_type='LOW_STOCK')
+                for _ in range(count)
+            )
+
+    def unread_count(self):
+        return self.client.get(self.url + 'unread_count/', **self.auth).json()['count']
+
+    def test_count_is_served_from_cache_and_kept_current(self):
+        self.notify(2)
+        self.assertEqual(self.unread_count(), 2)
+        self.notify(3)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.unread_count(), 5)
+        self.assertFalse(any('notifications_notification' in q['sql'] for q in queries))
+
+        notification = Notification.objects.filter(recipient=self.user).first()
+        self.client.post(f'{self.url}{notification.pk}/mark_as_read/', **self.auth)
+        self.client.post(f'{self.url}{notification.pk}/mark_as_read/', **self.auth)    # Already read
+        self.assertEqual(self.unread_count(), 4)
+
+        self.client.post(self.url + 'mark_all_as_read/', **self.auth)
+        self.assertEqual(self.unread_count(), 0)
+
+    def test_created_notification_goes_to_the_sender_by_default(self):
+        item = InventoryItem.objects.create(name='Pen', category=Category.objects.create(name='Pens'), quantity=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {
+                'message': 'Check the pens', 'notification_type': 'LOW_STOCK',
+                'content_type': 'inventoryitem', 'object_id': item.pk,
+            }, content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['content_object']['id'], item.pk)
+        self.assertEqual(self.unread_count(), 1)
+
+        response = self.client.post(self.url, {'message': 'Hi', 'recipient': 999999}, content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    def test_expired_count_is_reconciled_from_database(self):
+        self.notify(1)
+        self.assertEqual(self.unread_count(), 1)
+        # Written behind the counter's back, then the entry times out
+        Notification.objects.filter(recipient=self.user).update(is_read=True)
+        self.assertEqual(self.unread_count(), 1)
+        cache.delete(unread_count_key(self.user.id))
+        self.assertEqual(self.unread_count(), 0)
+
+
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='teacher@school.test', password='pass', role='teacher')
+
+    def test_committed_notifications_are_pushed_to_subscribers(self):
+        broker = get_broker()
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        async def subscribe():
+            return broker.subscribe(self.user.id)
+
+        queue = loop.run_until_complete(subscribe())
+        self.addCleanup(broker.unsubscribe, self.user.id, queue)
+        with self.captureOnCommitCallbacks(execute=True):
+            dispatcher.queue([Notification(recipient=self.user, message='Pens are low', notification_type='LOW_STOCK')])
+
+        event = loop.run_until_complete(asyncio.wait_for(queue.get(), 1))
+        self.assertEqual(event['message'], 'Pens are low')
+        self.assertEqual(event['id'], Notification.objects.get().id)
+
+    def test_stream_requires_a_token(self):
+        response = self.client.get('/api/notifications/stream/', {'token': 'not-a-jwt'})
+        self.assertEqual(response.status_code, 401)
+
+
+class NotificationListQueryTests(TestCase):
+    url = '/api/notifications/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='manager@school.test', password='pass', role='stock_manager')
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        self.teacher = User.objects.create_user(email='teacher@school.test', password='pass', role='teacher')
+        self.category = Category.objects.create(name='Pens')
+
+    def create_notifications(self, count, offset=0):
+        rows = []
+        for i in range(offset, offset + count):
+            item = InventoryItem.objects.create(name=f'Item {i}', category=self.category, quantity=1)
+            request = Request.objects.create(item=item, quantity=1, user=self.user)
+            assigned = TeacherInventoryItem.objects.create(teacher=self.teacher, item=item, quantity=1)
+            for obj, kind in ((item, 'LOW_STOCK'), (request, 'NEW_REQUEST'), (assigned, 'LOW_STOCK')):
+                rows.append(Notification(
+                    recipient=self.user, message='...', notification_type=kind,
+                    content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk
+                ))
+        Notification.objects.bulk_create(rows)
+
+    def test_content_objects_are_resolved_in_bulk(self):
+        self.create_notifications(1)
+        self.client.get(self.url + 'recent/', **self.auth)    # Warms the cached auth user
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url, **self.auth)
+
+        self.create_notifications(8, offset=1)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.url, **self.auth)
+            self.client.get(self.url + 'recent/', **self.auth)
+
+        data = response.json()
+        self.assertEqual(len(data), 27)
+        self.assertIn(data[0]['content_object']['display'], {'Item 8 (Pens)', 'Item 8 - 1 (pending)', 'teacher@school.test - Item 8 (1)'})
+        self.assertEqual(len(large), 2 * len(small))
+
+
+class NotificationFeedTests(TestCase):
+    url = '/api/notifications/feed/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='teacher@school.test', password='pass', role='teacher')
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def notify(self, *messages):
+        # bulk_create gives every row the same default timestamp, so only the id orders them
+        Notification.objects.bulk_create(
+            Notification(recipient=self.user, message=message, notification_type='LOW_STOCK')
+            for message in messages
+        )
+
+    def get(self, **params):
+        response = self.client.get(self.url, params, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_since_returns_only_new_notifications(self):
+        self.notify('a', 'b')
+        first = self.get()
+        self.assertEqual([n['message'] for n in first['results']], ['b', 'a'])
+
+        self.assertEqual(self.get(since=first['latest'])['results'], [])
+        self.notify('c')
+        update = self.get(since=first['latest'])
+        self.assertEqual([n['message'] for n in update['results']], ['c'])
+
+    def test_before_pages_back_through_history(self):
+        self.notify('a', 'b', 'c', 'd', 'e')
+        page = self.get(limit=2)
+        self.assertEqual([n['message'] for n in page['results']], ['e', 'd'])
+        self.assertTrue(page['has_more'])
+        page = self.get(limit=2, before=page['oldest'])
+        self.assertEqual([n['message'] for n in page['results']], ['c', 'b'])
+        page = self.get(limit=2, before=page['oldest'])
+        self.assertEqual(([n['message'] for n in page['results']], page['has_more']), (['a'], False))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {'since': 'garbage'}, **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+
+class PruneNotificationsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='manager@school.test', password='pass', role='stock_manager')
+        self.item_type = ContentType.objects.get_for_model(InventoryItem)
+
+    def notification(self, days_old=0, is_read=False, object_id=None):
+        return Notification.objects.create(
+            recipient=self.user, message='...', notification_type='LOW_STOCK', is_read=is_read,
+            timestamp=timezone.now() - timedelta(days=days_old),
+            content_type=self.item_type if object_id else None, object_id=object_id
+        )
+
+    def test_expired_read_rows_and_duplicate_alerts_are_removed(self):
+        old_read = self.notification(days_old=100, is_read=True)
+        old_unread = self.notification(days_old=100)
+        recent_read = self.notification(days_old=1, is_read=True)
+        first_alert = self.notification(days_old=2, object_id=7)
+        latest_alert = self.notification(days_old=1, object_id=7)
+        other_item = self.notification(days_old=2, object_id=8)
+
+        out = StringIO()
+        call_command('prune_notifications', '--days=90', '--batch-size=1', stdout=out)
+
+        self.assertEqual(
+            set(Notification.objects.values_list('id', flat=True)),
+            {old_unread.id, recent_read.id, latest_alert.id, other_item.id}
+        )
+        self.assertIn('Removed 1 expired and 1 duplicate', out.getvalue())
+
+
+class DispatcherTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='teacher@school.test', password='pass', role='teacher')
+
+    def notification(self, message):
+        return Notification(recipient=self.user, message=message, notification_type='SYSTEM')
+
+    def test_batches_of_a_transaction_are_written_together(self):
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            dispatcher.queue([self.notification('first')])
+            dispatcher.queue([self.notification('second')])
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "notifications_notification"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(self.user.notifications.count(), 2)
+
+    def test_batch_from_rolled_back_savepoint_is_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                dispatcher.queue([self.notification('kept')])
+                try:
+                    with transaction.atomic():
+                        dispatcher.queue([self.notification('rolled back')])
+                        raise ValueError
+                except ValueError:
+                    pass
+                dispatcher.queue([self.notification('also kept')])
+        self.assertEqual(
+            sorted(self.user.notifications.values_list('message', flat=True)), ['also kept', 'kept']
+        )
+
+
+class LowStockCoalescingTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(email='manager@school.test', password='pass', role='stock_manager')
+        self.item = InventoryItem.objects.create(
+            name='Pen', category=Category.objects.create(name='Pens'), quantity=20, low_stock_threshold=10
+        )
+
+    def deduct(self, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.refresh_from_db()
+            self.item.quantity -= quantity
+            self.item.save()
+
+    def test_repeated_alerts_refresh_the_unread_one(self):
+        self.deduct(12)     # Crosses the threshold
+        self.deduct(-12)    # Back above it
+        self.deduct(15)     # Crosses again
+
+        alerts = self.manager.notifications.filter(notification_type='LOW_STOCK')
+        self.assertEqual(alerts.count(), 1)
+        self.assertIn('Current quantity: 5', alerts.get().message)
+
+    def test_read_alerts_are_not_reused(self):
+        self.deduct(12)
+        self.manager.notifications.update(is_read=True)
+        self.deduct(-12)
+        self.deduct(15)
+        self.assertEqual(self.manager.notifications.filter(notification_type='LOW_STOCK').count(), 2)
@@ -1,9 +1,9 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .api import NotificationViewSet
+from .api import NotificationViewSet, notification_stream
 
 # Router for auto-generating standard RESTful endpoints 
-# router = DefaultRouter()
+router = DefaultRouter()
 router.register(r'notifications', NotificationViewSet, basename='notification')
 
 # === Additional custom URLs that aren't covered by the ViewSet === 
@@ -18,6 +18,14 @@ urlpatterns = [
          NotificationViewSet.as_view({'post': 'mark_all_as_read'}), 
          name='notification-mark-all-read'),
 
+    # Custom GET route for the incremental (since/before cursor) feed
+    path('notifications/feed/',
+         NotificationViewSet.as_view({'get': 'feed'}),
+         name='notification-feed'),
+
+    # Server-Sent Events stream pushing new notifications as they are committed
+    path('notifications/stream/', notification_stream, name='notification-stream'),
+
      # Custom GET route to retrieve only the most recent notifications
     path('notifications/recent/', 
          NotificationViewSet.as_view({'get': 'recent'}), 
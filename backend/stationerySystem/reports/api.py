@@ -1,7 +1,7 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework import status
+from rest_framework import status, serializers
 from django.db.models import Count, Q, Sum, F   # Aggregate SQL functions
 from inventory.models import InventoryItem, StockLog
 from requests.models import Request
@@ -9,18 +9,141 @@ from inventory.serializers import StockReportSerializer
 from requests.serializers import RequestSerializer
 from django.contrib.auth import get_user_model
 from datetime import datetime
+import csv
+import tempfile
+from itertools import chain, islice
 import openpyxl     #Used for Excel export (complex output formatting)
+from openpyxl.utils import get_column_letter
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
 from reportlab.lib.styles import getSampleStyleSheet
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse, FileResponse
 from io import BytesIO
 from rest_framework.authentication import SessionAuthentication
 from django.utils.timezone import make_aware
 
 User = get_user_model()
 
+REPORT_TYPES = ('stock', 'requests', 'teacher')
+EXPORT_FORMATS = ('pdf', 'excel', 'csv')
+EXPORT_CHUNK_SIZE = 2000            # Rows fetched per database round-trip when exporting
+EXPORT_WIDTH_SAMPLE_SIZE = 100      # Rows inspected to size spreadsheet columns
+
+# ----------------------------
+# SHARED REPORT QUERIES
+# ----------------------------
+def get_report_queryset(report_type, start_date=None, end_date=None):
+    """
+    Returns the base queryset for a report type, filtered by the date range.
+    Stock reports filter on when items were last updated, request-based reports on creation date.
+    """
+    if report_type == 'stock':
+        queryset = InventoryItem.objects.all()
+        date_field = 'updated_at'
+    else:
+        queryset = Request.objects.all()
+        date_field = 'created_at'
+
+    if start_date:
+        queryset = queryset.filter(**{f'{date_field}__gte': start_date})
+    if end_date:
+        queryset = queryset.filter(**{f'{date_field}__lte': end_date})
+    return queryset
+
+def get_report_stats(report_type, queryset):
+    """
+    Summary statistics for a report, computed with one aggregate() query
+    using filtered Counts instead of a separate count() per statistic.
+    """
+    if report_type == 'stock':
+        return queryset.aggregate(
+            total_items=Count('id'),
+            low_stock_items=Count('id', filter=Q(status='low_stock')),
+            out_of_stock_items=Count('id', filter=Q(status='out_of_stock')),
+        )
+    if report_type == 'requests':
+        return queryset.aggregate(
+            total_requests=Count('id'),
+            approved_requests=Count('id', filter=Q(status='approved')),
+            pending_requests=Count('id', filter=Q(status='pending')),
+        )
+    return queryset.aggregate(
+        total_teachers=Count('user', distinct=True),
+        total_requests=Count('id'),
+        approved_requests=Count('id', filter=Q(status='approved')),
+    )
+
+def get_teacher_summary(queryset):
+    """
+    Per-teacher request totals (SQL aggregation with filter condition).
+    """
+    summary = queryset.values(
+        'user__email',
+        'user__first_name',
+        'user__last_name'
+    ).annotate(
+        total_requests=Count('id'),
+        approved_requests=Count('id', filter=Q(status='approved'))
+    ).order_by('-total_requests')
+
+    return [
+        {
+            'user_email': item['user__email'],
+            'user_name': f"{item['user__first_name'] or ''} {item['user__last_name'] or ''}".strip(),
+            'total_requests': item['total_requests'],
+            'approved_requests': item['approved_requests']
+        }
+        for item in summary
+    ]
+
+def get_export_rows(report_type, queryset, start_date=None, end_date=None):
+    """
+    Returns the export headers and a lazy iterator over the rows.
+    Rows are read straight from the database in chunks with iterator(),
+    so large exports are never held in memory as model instances.
+    """
+    if report_type == 'stock':
+        headers = ['ID', 'Name', 'Quantity', 'Usage', 'Status']
+        items = queryset.with_usage(start_date, end_date).values_list(
+            'id', 'name', 'quantity', 'usage_total', 'status'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        rows = ([pk, name, quantity, abs(usage), item_status] for pk, name, quantity, usage, item_status in items)
+
+    elif report_type == 'requests':
+        headers = ['ID', 'Teacher', 'Item', 'Status', 'Date']
+        date_field = serializers.DateTimeField()   # Same date format as the JSON report
+        request_rows = queryset.values_list(
+            'id', 'user_id', 'user__first_name', 'user__last_name', 'item__name', 'status', 'created_at'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        rows = (
+            [
+                pk,
+                f"{first_name or ''} {last_name or ''}".strip() if user_id else 'N/A',
+                item_name or 'N/A',
+                request_status,
+                date_field.to_representation(created_at)
+            ]
+            for pk, user_id, first_name, last_name, item_name, request_status, created_at in request_rows
+        )
+
+    else:
+        headers = ['Teacher Email', 'Teacher Name', 'Total Requests', 'Approved Requests']
+        rows = (
+            [item['user_email'], item['user_name'], item['total_requests'], item['approved_requests']]
+            for item in get_teacher_summary(queryset)
+        )
+
+    return headers, rows
+
+class Echo:
+    """
+    File-like object for csv.writer: returns each written line instead of buffering it,
+    so rows can be streamed straight into a StreamingHttpResponse.
+    """
+    def write(self, value):
+        return value
+
 # ----------------------------
 # GET REPORT DATA (JSON)
 # ----------------------------
@@ -41,77 +164,31 @@ class ReportView(APIView):
         except ValueError:
             return Response({"error": "Invalid date format"}, status=status.HTTP_400_BAD_REQUEST)
 
-        data = []
-        stats = {}
+        if report_type not in REPORT_TYPES:
+            return Response({"error": "Invalid report type"}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = get_report_queryset(report_type, start_date, end_date)
+        stats = get_report_stats(report_type, queryset)
 
          # Handle different report types
         if report_type == 'stock':
-            queryset = InventoryItem.objects.all()
-            if start_date:
-                queryset = queryset.filter(updated_at__gte=start_date)
-            if end_date:
-                queryset = queryset.filter(updated_at__lte=end_date)
-            
-            # Aggregate logic to count statuses
+            # Usage for every item is annotated in the same query
             serializer_context = {'start_date': start_date, 'end_date': end_date}
-            data = StockReportSerializer(queryset, many=True, context=serializer_context).data
-            stats = {
-                'total_items': queryset.count(),
-                'low_stock_items': queryset.filter(status='low_stock').count(),
-                'out_of_stock_items': queryset.filter(status='out_of_stock').count(),
-            }
+            data = StockReportSerializer(
+                queryset.with_usage(start_date, end_date), many=True, context=serializer_context
+            ).data
 
         elif report_type == 'requests':
-            queryset = Request.objects.select_related('user', 'item').all()
-            if start_date:
-                queryset = queryset.filter(created_at__gte=start_date)
-            if end_date:
-                queryset = queryset.filter(created_at__lte=end_date)
-            data = RequestSerializer(queryset, many=True).data
-            stats = {
-                'total_requests': queryset.count(),
-                'approved_requests': queryset.filter(status='approved').count(),
-                'pending_requests': queryset.filter(status='pending').count(),
-            }
-
-        elif report_type == 'teacher':
-            # SQL aggregation with filter condition
-            queryset = Request.objects.values(
-                'user__email',
-                'user__first_name',
-                'user__last_name'
-            ).annotate(
-                total_requests=Count('id'),
-                approved_requests=Count('id', filter=Q(status='approved'))
-            ).order_by('-total_requests')
-            
-            if start_date:
-                queryset = queryset.filter(created_at__gte=start_date)
-            if end_date:
-                queryset = queryset.filter(created_at__lte=end_date)
-            
-            data = [
-                {
-                    'user_email': item['user__email'],
-                    'user_name': f"{item['user__first_name'] or ''} {item['user__last_name'] or ''}".strip(),
-                    'total_requests': item['total_requests'],
-                    'approved_requests': item['approved_requests']
-                }
-                for item in queryset
-            ]
-            stats = {
-                'total_teachers': len(data),
-                'total_requests': sum(item['total_requests'] for item in data),
-                'approved_requests': sum(item['approved_requests'] for item in data),
-            }
+            # Same joins/prefetches as the request list, so the query count doesn't grow with rows
+            data = RequestSerializer(queryset.with_details(), many=True).data
 
         else:
-            return Response({"error": "Invalid report type"}, status=status.HTTP_400_BAD_REQUEST)
+            data = get_teacher_summary(queryset)
 
         return Response({"data": data, "stats": stats})
 
 # ----------------------------
-# EXPORT REPORT AS PDF/EXCEL
+# EXPORT REPORT AS PDF/EXCEL/CSV
 # ----------------------------
 class ReportExportView(APIView):
     permission_classes = [AllowAny]
@@ -128,88 +205,36 @@ class ReportExportView(APIView):
         except ValueError:
             return Response({"error": "Invalid date format"}, status=status.HTTP_400_BAD_REQUEST)
 
-        headers = []
-        rows = []
-
-         # Same logic reused to generate report content based on type
-        if report_type == 'stock':
-            queryset = InventoryItem.objects.all()
-            if start_date:
-                queryset = queryset.filter(updated_at__gte=start_date)
-            if end_date:
-                queryset = queryset.filter(updated_at__lte=end_date)
-            serializer_context = {'start_date': start_date, 'end_date': end_date}
-            data = StockReportSerializer(queryset, many=True, context=serializer_context).data
-            headers = ['ID', 'Name', 'Quantity', 'Usage', 'Status']
-            rows = [[item['id'], item['name'], item['quantity'], item['usage'], item['status']] for item in data]
-
-        elif report_type == 'requests':
-            queryset = Request.objects.select_related('user', 'item').all()
-            if start_date:
-                queryset = queryset.filter(created_at__gte=start_date)
-            if end_date:
-                queryset = queryset.filter(created_at__lte=end_date)
-            data = RequestSerializer(queryset, many=True).data
-            headers = ['ID', 'Teacher', 'Item', 'Status', 'Date']
-            rows = [
-                [
-                    item['id'],
-                    f"{item['user']['first_name'] or ''} {item['user']['last_name'] or ''}".strip() if item['user'] else 'N/A',
-                    item['item']['name'] if item['item'] else 'N/A',
-                    item['status'],
-                    item['created_at']
-                ]
-                for item in data
-            ]
+        if report_type not in REPORT_TYPES:
+            return Response({"error": "Invalid report type"}, status=status.HTTP_400_BAD_REQUEST)
 
-        elif report_type == 'teacher':
-            queryset = Request.objects.values(
-                'user__email',
-                'user__first_name',
-                'user__last_name'
-            ).annotate(
-                total_requests=Count('id'),
-                approved_requests=Count('id', filter=Q(status='approved'))
-            ).order_by('-total_requests')
-            
-            if start_date:
-                queryset = queryset.filter(created_at__gte=start_date)
-            if end_date:
-                queryset = queryset.filter(created_at__lte=end_date)
-            
-            data = [
-                {
-                    'user_email': item['user__email'],
-                    'user_name': f"{item['user__first_name'] or ''} {item['user__last_name'] or ''}".strip(),
-                    'total_requests': item['total_requests'],
-                    'approved_requests': item['approved_requests']
-                }
-                for item in queryset
-            ]
-            headers = ['Teacher Email', 'Teacher Name', 'Total Requests', 'Approved Requests']
-            rows = [
-                [item['user_email'], item['user_name'], item['total_requests'], item['approved_requests']]
-                for item in data
-            ]
+        if format_type not in EXPORT_FORMATS:
+            return Response({"error": "Invalid format"}, status=status.HTTP_400_BAD_REQUEST)
 
-        else:
-            return Response({"error": "Invalid report type"}, status=status.HTTP_400_BAD_REQUEST)
+        # Same queries as ReportView, reused to generate report content based on type
+        queryset = get_report_queryset(report_type, start_date, end_date)
+        headers, rows = get_export_rows(report_type, queryset, start_date, end_date)
 
         if format_type == 'pdf':
-            return self.generate_pdf(report_type, headers, rows)
+            # The PDF table is laid out in one go, so its rows are materialised
+            stats = get_report_stats(report_type, queryset)
+            return self.generate_pdf(report_type, headers, list(rows), stats)
         elif format_type == 'excel':
             return self.generate_excel(report_type, headers, rows)
-        else:
-            return Response({"error": "Invalid format"}, status=status.HTTP_400_BAD_REQUEST)
+        return self.generate_csv(report_type, headers, rows)
     
      # Complex user-defined routine: generates a styled PDF table
-    def generate_pdf(self, report_type, headers, rows):
+    def generate_pdf(self, report_type, headers, rows, stats=None):
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter)
         elements = []
 
         styles = getSampleStyleSheet()
         elements.append(Paragraph(f"{report_type.capitalize()} Report", styles['Title']))
+        if stats:
+            # One-line summary of the report statistics under the title
+            summary = ', '.join(f"{key.replace('_', ' ').capitalize()}: {value}" for key, value in stats.items())
+            elements.append(Paragraph(summary, styles['Normal']))
 
         data = [headers] + rows
         table = Table(data)
@@ -234,37 +259,39 @@ class ReportExportView(APIView):
         buffer.close()
         return response
 
-    # Complex user-defined routine: Excel export with styling
+    # Complex user-defined routine: Excel export, written row by row
     def generate_excel(self, report_type, headers, rows):
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = f"{report_type.capitalize()} Report"
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=f"{report_type.capitalize()} Report")
+
+        # Adjust column widths from the headers and a sample of rows instead of every cell
+        # (write-only sheets need widths set before the first row is appended)
+        sample = list(islice(rows, EXPORT_WIDTH_SAMPLE_SIZE))
+        for index in range(len(headers)):
+            max_length = max(len(str(row[index])) for row in [headers] + sample)
+            sheet.column_dimensions[get_column_letter(index + 1)].width = max_length + 2
 
         sheet.append(headers)
-        for row in rows:
+        for row in chain(sample, rows):
             sheet.append(row)
 
-        # Adjust column widths dynamically
-        for col in sheet.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = max_length + 2
-            sheet.column_dimensions[column].width = adjusted_width
-
-        buffer = BytesIO()
-        workbook.save(buffer)
-        buffer.seek(0)
-
-        response = HttpResponse(
+        # Saved to a temporary file so the workbook never sits in memory, then streamed in chunks
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f"{report_type}_report.xlsx",
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
-        response['Content-Disposition'] = f'attachment; filename="{report_type}_report.xlsx"'
-        response.write(buffer.getvalue())
-        buffer.close()
-        return response
\ No newline at end of file
+
+    # CSV export streamed to the client while rows are still being read from the database
+    def generate_csv(self, report_type, headers, rows):
+        writer = csv.writer(Echo())
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in chain([headers], rows)),
+            content_type='text/csv'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{report_type}_report.csv"'
+        return response
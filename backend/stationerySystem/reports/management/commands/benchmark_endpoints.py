@@ -0,0 +1,209 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from io import StringIO
+import django
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from inventory.models import Category, InventoryItem, TeacherInventoryItem
+from notifications.models import Notification
+from requests.models import Request
+from users.models import User, Class, Subject
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the inventory, requests, notifications, users and reports endpoints (reads and "
+        "writes) through the test client on a throwaway test database seeded at several sizes. Writes "
+        "p50/p95 latency, query count and peak memory per endpoint to a JSON file meant to be diffed "
+        "between commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='0.2,1,5',
+                            help="Comma-separated seed_data scales to benchmark (default 0.2,1,5)")
+        parser.add_argument('--iterations', type=int, default=20, help="Timed calls per endpoint and size")
+        parser.add_argument('--output', default='benchmark.json', help="Where to write the results")
+        parser.add_argument('--keepdb', action='store_true', help="Reuse the test database between runs")
+
+    def handle(self, *args, **options):
+        sizes = [float(size) for size in options['sizes'].split(',')]
+        results = {}
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        # Never benchmark against real data: every size is seeded into a fresh test database
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            for size in sizes:
+                call_command('flush', interactive=False, verbosity=0)
+                call_command('seed_data', scale=size, stdout=StringIO())
+                self.stdout.write(f"Size {size:g}: benchmarking...")
+                results[f'{size:g}'] = self.run_size(options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'generated_at': timezone.now().isoformat(),
+                'iterations': options['iterations'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def endpoints(self):
+        """
+        (name, method, path, payload, role) for every endpoint. Each call is rolled back
+        afterwards so the dataset stays the same, but its on-commit work (batched
+        notification writes) runs first and is included. The SSE stream never ends, so it
+        is left out (see the sse_loadtest command).
+        """
+        item = InventoryItem.objects.filter(quantity__gt=100).first() or InventoryItem.objects.first()
+        assignment = TeacherInventoryItem.objects.first()
+        # A pending request its item can cover, so approving it succeeds
+        request = (
+            Request.objects.filter(status=Request.PENDING, item__quantity__gte=F('quantity')).first()
+            or Request.objects.first()
+        )
+        pending = list(Request.objects.filter(status=Request.PENDING).values_list('id', flat=True)[:20])
+        notification = Notification.objects.filter(recipient=self.manager).first()
+        category = Category.objects.first()
+        class_subject = {'classId': Class.objects.first().pk, 'subjectId': Subject.objects.first().pk}
+        item_payload = {'name': 'Benchmark Item', 'category_id': category.pk, 'quantity': 40, 'low_stock_threshold': 5}
+        delivery = [
+            {'name': name, 'category': category.name, 'quantity': 25}
+            for name in InventoryItem.objects.values_list('name', flat=True)[:50]
+        ] + [{'name': f'Benchmark Delivery {i}', 'category': 'Benchmark Supplies', 'quantity': 10} for i in range(10)]
+        teachers = [
+            {'email': f'bench{i}@seed.invalid', 'password': 'password123', 'firstName': 'Bench',
+             'lastName': str(i), 'classSubjects': [class_subject]}
+            for i in range(5)
+        ]
+        return [
+            # inventory/urls.py
+            ('categories', 'get', '/api/inventory/categories/', None, 'manager'),
+            ('categories-create', 'post', '/api/inventory/categories/', {'name': 'Benchmark Category'}, 'manager'),
+            ('inventory-list', 'get', '/api/inventory/inventory/', None, 'manager'),
+            ('inventory-list-page', 'get', '/api/inventory/inventory/?page_size=50', None, 'manager'),
+            ('inventory-create', 'post', '/api/inventory/inventory/', item_payload, 'manager'),
+            ('inventory-import', 'post', '/api/inventory/inventory/import/', delivery, 'manager'),
+            ('inventory-detail', 'get', f'/api/inventory/inventory/{item.pk}/', None, 'manager'),
+            ('inventory-update', 'put', f'/api/inventory/inventory/{item.pk}/',
+             dict(item_payload, name=item.name, quantity=max(item.quantity - 1, 0)), 'manager'),
+            ('inventory-delete', 'delete', f'/api/inventory/inventory/{item.pk}/', None, 'manager'),
+            ('inventory-deduct', 'post', f'/api/inventory/inventory/items/{item.pk}/deduct/', {'quantity': 1}, 'manager'),
+            ('teacher-inventory-list', 'get', '/api/inventory/teacher/inventory/', None, 'manager'),
+            ('teacher-inventory-create', 'post', '/api/inventory/teacher/inventory/',
+             dict(item_payload, name='Benchmark Teacher Item'), 'teacher'),
+            ('teacher-inventory-detail', 'get', f'/api/inventory/teacher/inventory/{assignment.pk}/', None, 'manager'),
+            # requests/urls.py
+            ('requests-list', 'get', '/api/requests/requests/', None, 'manager'),
+            ('requests-list-page', 'get', '/api/requests/requests/?page_size=50', None, 'manager'),
+            ('requests-list-teacher', 'get', '/api/requests/requests/', None, 'teacher'),
+            ('requests-detail', 'get', f'/api/requests/requests/{request.pk}/', None, 'manager'),
+            ('requests-create-bulk', 'post', '/api/requests/requests/',
+             [{'item_id': item.pk, 'quantity': 1}] * 10, 'teacher'),
+            ('requests-partial-update', 'patch', f'/api/requests/requests/{request.pk}/',
+             {'status': 'approved'}, 'manager'),
+            ('requests-update-status', 'patch', f'/api/requests/requests/{request.pk}/update_status/',
+             {'status': 'rejected'}, 'manager'),
+            ('requests-approve', 'patch', f'/api/requests/requests/{request.pk}/approve/', {}, 'manager'),
+            ('requests-bulk-update-status', 'post', '/api/requests/requests/bulk_update_status/',
+             {'ids': pending, 'status': 'approved'}, 'manager'),
+            # notifications/urls.py
+            ('notifications-list', 'get', '/api/notifications/', None, 'manager'),
+            ('notifications-create', 'post', '/api/notifications/',
+             {'message': 'Benchmark', 'notification_type': 'REQUEST_STATUS'}, 'manager'),
+            ('notifications-update', 'patch', f'/api/notifications/{notification.pk}/', {'is_read': True}, 'manager'),
+            ('notifications-delete', 'delete', f'/api/notifications/{notification.pk}/', None, 'manager'),
+            ('notifications-recent', 'get', '/api/notifications/recent/', None, 'manager'),
+            ('notifications-feed', 'get', '/api/notifications/feed/', None, 'manager'),
+            ('notifications-unread-count', 'get', '/api/notifications/unread_count/', None, 'manager'),
+            ('notifications-mark-as-read', 'post', f'/api/notifications/{notification.pk}/mark_as_read/', None, 'manager'),
+            ('notifications-mark-all-as-read', 'post', '/api/notifications/mark_all_as_read/', None, 'manager'),
+            # users/urls.py
+            ('users-bootstrap', 'get', '/api/users/bootstrap/', None, 'teacher'),
+            ('users-bootstrap-manager', 'get', '/api/users/bootstrap/', None, 'manager'),
+            ('users-teacher-import', 'post', '/api/users/teachers/import/', teachers, 'admin'),
+            # reports/urls.py
+            ('reports-stock', 'get', '/api/reports/?type=stock', None, 'manager'),
+            ('reports-requests', 'get', '/api/reports/?type=requests', None, 'manager'),
+            ('reports-teacher', 'get', '/api/reports/?type=teacher', None, 'manager'),
+            ('reports-export-csv', 'post', '/api/reports/export/', {'type': 'stock', 'format': 'csv'}, 'manager'),
+            ('reports-export-excel', 'post', '/api/reports/export/', {'type': 'requests', 'format': 'excel'}, 'manager'),
+            ('reports-export-pdf', 'post', '/api/reports/export/', {'type': 'stock', 'format': 'pdf'}, 'manager'),
+        ]
+
+    def run_size(self, iterations):
+        self.manager = User.objects.filter(role='stock_manager').first()
+        teacher = User.objects.filter(role='teacher').first()
+        admin = User.objects.filter(role='admin').first()
+        clients = {
+            role: Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+            for role, user in (('manager', self.manager), ('teacher', teacher), ('admin', admin))
+        }
+
+        results = {}
+        for name, method, path, payload, role in self.endpoints():
+            client = clients[role]
+            call = lambda: self.call(client, method, path, payload)
+            cache.clear()
+            status_code = call()    # Warm-up (imports, connection, cold caches)
+
+            latencies, queries = [], []
+            for _ in range(iterations):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    call()
+                    latencies.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured))
+
+            # Separate traced call: tracemalloc slows everything down, so it is kept out of the timings
+            tracemalloc.start()
+            call()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            latencies.sort()
+            results[name] = {
+                'status': status_code,
+                'p50_ms': round(statistics.median(latencies), 2),
+                'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+                'queries': max(queries),
+                'peak_memory_kb': round(peak / 1024, 1),
+            }
+            self.stdout.write(f"  {name:32} {results[name]['p50_ms']:>9.2f} ms p50  {results[name]['queries']:>4} queries")
+        return results
+
+    def call(self, client, method, path, payload):
+        """
+        Makes one request (consuming streamed bodies) and returns its status code.
+        The on-commit callbacks it registers run before the rollback, as they would on commit.
+        """
+        with transaction.atomic():
+            with TestCase.captureOnCommitCallbacks(execute=True):
+                if payload is None:
+                    response = getattr(client, method)(path)
+                else:
+                    response = getattr(client, method)(path, payload, content_type='application/json')
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+            transaction.set_rollback(True)  # Keep the dataset identical for every call
+        return response.status_code
@@ -0,0 +1,176 @@
+import random
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from inventory.models import Category, InventoryItem, TeacherInventoryItem, StockLog
+from notifications.models import Notification
+from requests.models import Request
+from users.models import User, TeacherProfile, TeacherClassSubject, Class, Subject
+
+# Row counts at --scale 1; every count is multiplied by the scale
+BASE_COUNTS = {
+    'categories': 10,
+    'classes': 12,
+    'subjects': 8,
+    'items': 200,
+    'teachers': 50,
+    'requests': 1000,
+    'stock_logs': 3000,
+    'notifications': 3000,
+}
+
+SEED_EMAIL_DOMAIN = 'seed.invalid'
+SEED_PASSWORD = 'password123'
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a synthetic dataset (categories, items, teachers with class/subject assignments, "
+        "requests, stock history and notifications) with bulk inserts, for demos and benchmarks. "
+        f"Seeded users log in with the password '{SEED_PASSWORD}'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help="Multiplier applied to every row count")
+        for name, count in BASE_COUNTS.items():
+            parser.add_argument(f"--{name.replace('_', '-')}", type=int, help=f"Override the count (default {count} x scale)")
+        parser.add_argument('--days', type=int, default=90, help="History is spread over this many past days")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed, so runs are reproducible")
+        parser.add_argument('--clear', action='store_true', help="Delete previously seeded rows first")
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.days = max(options['days'], 1)
+        counts = {
+            name: options[name] if options[name] is not None else max(1, round(count * options['scale']))
+            for name, count in BASE_COUNTS.items()
+        }
+
+        with transaction.atomic():
+            if options['clear']:
+                self.clear()
+            self.seed(counts)
+
+        # Rollup and caches are derived from the rows written above
+        call_command('rebuild_stock_usage', stdout=self.stdout)
+        cache.clear()
+
+        self.stdout.write(self.style.SUCCESS(
+            "Seeded " + ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items())
+        ))
+
+    def clear(self):
+        # Users cascade to their profiles, requests, assignments and notifications
+        User.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}').delete()
+        InventoryItem.objects.filter(name__startswith='Seed ').delete()
+        Category.objects.filter(name__startswith='Seed ').delete()
+        Class.objects.filter(name__startswith='Seed ').delete()
+        Subject.objects.filter(name__startswith='Seed ').delete()
+
+    def past(self):
+        """A random moment within the history window."""
+        return self.now - timedelta(seconds=self.random.randrange(self.days * 24 * 60 * 60))
+
+    def seed(self, counts):
+        rnd = self.random
+        suffix = self.now.strftime('%Y%m%d%H%M%S')  # Keeps unique names unique across runs
+
+        categories = Category.objects.bulk_create(
+            Category(name=f'Seed Category {suffix}-{i}') for i in range(counts['categories'])
+        )
+        classes = Class.objects.bulk_create(
+            Class(name=f'Seed Class {suffix}-{i}', grade_level=str(7 + i % 6)) for i in range(counts['classes'])
+        )
+        subjects = Subject.objects.bulk_create(
+            Subject(name=f'Seed Subject {suffix}-{i}') for i in range(counts['subjects'])
+        )
+
+        # Hash once: hashing a password per user would dominate the run
+        password = make_password(SEED_PASSWORD)
+        staff = User.objects.bulk_create([
+            User(email=f'admin-{suffix}@{SEED_EMAIL_DOMAIN}', role='admin', password=password, is_staff=True),
+            User(email=f'manager-{suffix}@{SEED_EMAIL_DOMAIN}', role='stock_manager', password=password),
+        ])
+        teachers = User.objects.bulk_create(
+            User(email=f'teacher{i}-{suffix}@{SEED_EMAIL_DOMAIN}', role='teacher', password=password,
+                 first_name='Teacher', last_name=str(i))
+            for i in range(counts['teachers'])
+        )
+        profiles = TeacherProfile.objects.bulk_create(TeacherProfile(user=teacher) for teacher in teachers)
+        TeacherClassSubject.objects.bulk_create(
+            TeacherClassSubject(teacher=profile, class_taught=class_taught, subject=subject)
+            for profile in profiles
+            for class_taught, subject in {
+                (rnd.choice(classes), rnd.choice(subjects)) for _ in range(rnd.randint(1, 3))
+            }
+        )
+
+        items = []
+        for i in range(counts['items']):
+            item = InventoryItem(
+                name=f'Seed Item {suffix}-{i}',
+                category=rnd.choice(categories),
+                quantity=rnd.choice([0, rnd.randint(1, 10), rnd.randint(10, 500)]),
+                low_stock_threshold=rnd.randint(5, 20),
+            )
+            item.update_status()    # bulk_create skips save()
+            items.append(item)
+        items = InventoryItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+
+        TeacherInventoryItem.objects.bulk_create(
+            TeacherInventoryItem(teacher=teacher, item=item, quantity=rnd.randint(0, 30))
+            for teacher in teachers
+            for item in rnd.sample(items, min(len(items), 3))
+        )
+
+        statuses = [Request.PENDING, Request.APPROVED, Request.REJECTED]
+        requests = Request.objects.bulk_create((
+            Request(
+                item=rnd.choice(items), quantity=rnd.randint(1, 10), user=rnd.choice(teachers),
+                status=rnd.choice(statuses), stock_manager=staff[1],
+            )
+            for _ in range(counts['requests'])
+        ), batch_size=BATCH_SIZE)
+        # created_at is auto_now_add, so back-date it afterwards to spread requests over the window
+        for request in requests:
+            request.created_at = self.past()
+        Request.objects.bulk_update(requests, ['created_at'], batch_size=BATCH_SIZE)
+
+        StockLog.objects.bulk_create((
+            StockLog(
+                item=item, change=change, quantity_after_change=max(item.quantity, 0),
+                changed_by=staff[1], timestamp=self.past(),
+                reason='Restock' if change > 0 else 'Manual Update',
+            )
+            for item, change in (
+                (rnd.choice(items), rnd.choice([-1, -1, -2, -5, 10, 25])) for _ in range(counts['stock_logs'])
+            )
+        ), batch_size=BATCH_SIZE)
+
+        item_type = ContentType.objects.get_for_model(InventoryItem)
+        request_type = ContentType.objects.get_for_model(Request)
+        notifications = []
+        for _ in range(counts['notifications']):
+            if rnd.random() < 0.5:
+                item = rnd.choice(items)
+                notifications.append(Notification(
+                    recipient=rnd.choice([staff[1], *teachers[:5]]), notification_type='LOW_STOCK',
+                    message=f"{item.name} is running low.", content_type=item_type, object_id=item.id,
+                    link=f"/inventory/{item.id}", timestamp=self.past(), is_read=rnd.random() < 0.7,
+                ))
+            else:
+                request = rnd.choice(requests)
+                notifications.append(Notification(
+                    recipient=staff[1], notification_type='NEW_REQUEST',
+                    message=f"New request for {request.quantity} items", content_type=request_type,
+                    object_id=request.id, link=f"/requests/{request.id}", timestamp=self.past(),
+                    is_read=rnd.random() < 0.7,
+                ))
+        Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
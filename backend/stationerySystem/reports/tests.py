@@ -1,3 +1,112 @@
+from io import StringIO
+from django.core.management import call_command
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from inventory.models import Category, InventoryItem, StockLog, DailyStockUsage
+from requests.models import Request
+from users.models import User, TeacherProfile, TeacherClassSubject, Class, Subject
 
-# Create your tests here.
+
+class StockReportTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Pens')
+        self.url = reverse('reports')
+
+    def create_items(self, count, offset=0):
+        for i in range(offset, offset + count):
+            item = InventoryItem.objects.create(
+                name=f'Item {i}', category=self.category, quantity=50
+            )
+            StockLog.objects.create(item=item, change=-3, quantity_after_change=47)
+            StockLog.objects.create(item=item, change=-2, quantity_after_change=45)
+            StockLog.objects.create(item=item, change=10, quantity_after_change=55)
+
+    def test_usage_is_sum_of_stock_taken_out(self):
+        self.create_items(1)
+        response = self.client.get(self.url, {'type': 'stock'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'][0]['usage'], 5)
+
+    def test_query_count_does_not_grow_with_items(self):
+        self.create_items(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url, {'type': 'stock'})
+
+        self.create_items(20, offset=2)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.url, {'type': 'stock'})
+
+        self.assertEqual(len(response.json()['data']), 22)
+        self.assertEqual(len(small), len(large))
+
+    def test_stats_are_computed_by_status(self):
+        InventoryItem.objects.create(name='Full', category=self.category, quantity=50)
+        InventoryItem.objects.create(name='Low', category=self.category, quantity=2)
+        InventoryItem.objects.create(name='Empty', category=self.category, quantity=0)
+        response = self.client.get(self.url, {'type': 'stock'})
+        self.assertEqual(response.json()['stats'], {
+            'total_items': 3,
+            'low_stock_items': 1,
+            'out_of_stock_items': 1,
+        })
+
+    def test_csv_export_is_streamed(self):
+        self.create_items(3)
+        response = self.client.post(
+            reverse('export-reports'), {'type': 'stock', 'format': 'csv'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'ID,Name,Quantity,Usage,Status')
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(all(line.endswith(',5,in_stock') for line in lines[1:]))
+
+
+class RequestReportTests(TestCase):
+    def setUp(self):
+        self.url = reverse('reports')
+        self.item = InventoryItem.objects.create(name='Pen', category=Category.objects.create(name='Pens'), quantity=100)
+        self.class_taught = Class.objects.create(name='7A', grade_level='7')
+        self.subject = Subject.objects.create(name='Maths')
+
+    def create_requests(self, count, offset=0):
+        for i in range(offset, offset + count):
+            teacher = User.objects.create_user(email=f'teacher{i}@school.test', password='pass', role='teacher')
+            profile = TeacherProfile.objects.create(user=teacher)
+            TeacherClassSubject.objects.create(teacher=profile, class_taught=self.class_taught, subject=self.subject)
+            Request.objects.create(item=self.item, quantity=1, user=teacher)
+
+    def test_query_count_does_not_grow_with_requests(self):
+        self.create_requests(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url, {'type': 'requests'})
+
+        self.create_requests(20, offset=2)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.url, {'type': 'requests'})
+
+        data = response.json()['data']
+        self.assertEqual(len(data), 22)
+        self.assertEqual(data[0]['teacher_profile']['class_subjects'][0]['subject']['name'], 'Maths')
+        self.assertEqual(len(small), len(large))
+
+
+class SeedDataTests(TestCase):
+    def test_seeds_requested_counts_with_bulk_inserts(self):
+        call_command('seed_data', '--items=30', '--teachers=5', '--requests=40', '--stock-logs=60',
+                     '--notifications=20', stdout=StringIO())
+        self.assertEqual(InventoryItem.objects.count(), 30)
+        self.assertEqual(User.objects.filter(role='teacher').count(), 5)
+        self.assertEqual(Request.objects.count(), 40)
+        self.assertTrue(TeacherClassSubject.objects.exists())
+        # The usage rollup is rebuilt from the seeded ledger
+        self.assertEqual(
+            sum(DailyStockUsage.objects.values_list('units_out', flat=True)),
+            -sum(StockLog.objects.filter(change__lt=0).values_list('change', flat=True))
+        )
+
+        call_command('seed_data', '--clear', '--items=10', stdout=StringIO())
+        self.assertEqual(InventoryItem.objects.count(), 10)
@@ -5,8 +5,19 @@ from rest_framework.permissions import AllowAny  # Allow anyone in development
 from .models import Request
 from .serializers import RequestSerializer, RequestUpdateSerializer
 from django.db import transaction   # Transaction ensures atomic updates
+from django.db.models import prefetch_related_objects
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
 from inventory.models import InventoryItem
+from inventory.services import deduct_stock, deduct_stock_for_requests, InsufficientStockError
+from notifications.dispatcher import dispatcher
+from notifications.signals import request_status_notification
+from stationerySystem.filters import filter_by_params
+from stationerySystem.pagination import OptionalCursorPagination
+from stationerySystem.serializers import get_requested_fields
+from stationerySystem.conditional import conditional_list
+from stationerySystem.reference_cache import get_version
+from django.utils import timezone
 
 
 User = get_user_model()
@@ -14,6 +25,7 @@ User = get_user_model()
 class RequestViewSet(viewsets.ModelViewSet):
     serializer_class = RequestSerializer
     permission_classes = [AllowAny]  # In production, restrict this
+    pagination_class = OptionalCursorPagination  # Only paginates when ?page_size= or ?cursor= is sent
 
     """
         Returns a queryset depending on the user's role.
@@ -21,22 +33,48 @@ class RequestViewSet(viewsets.ModelViewSet):
         while teachers only see their own.
     """
     def get_queryset(self):
-        queryset = Request.objects.select_related(
-            'user__teacher_profile',
-            'item'
-        ).prefetch_related(
-            'user__teacher_profile__teacherclasssubject_set__class_taught',
-            'user__teacher_profile__teacherclasssubject_set__subject'
-        )   # Complex cross-table joins with select_related & prefetch_related
+        # Complex cross-table joins with select_related & prefetch_related
+        queryset = Request.objects.with_details()
 
         user = self.request.user
         if not user.is_authenticated:
             # In development, return all requests if unauthenticated
-            return Request.objects.all()
-        # Use the 'role' field for queryset filtering
+            return queryset
+        # Use the 'role' field for queryset filtering (applied on top of the optimised queryset)
         if user.role in ['stock_manager', 'admin']:
-            return Request.objects.all()
-        return Request.objects.filter(user=user)    # Filter for teacher-specific view
+            return queryset
+        return queryset.filter(user=user)    # Filter for teacher-specific view
+
+    def filter_queryset(self, queryset):
+        """
+        Applies list filters from the query string in SQL:
+        ?status=, ?item=, ?category=, ?user= and ?start_date=/?end_date= (creation date).
+        """
+        queryset = super().filter_queryset(queryset)
+        if self.action != 'list':
+            return queryset
+        return filter_by_params(
+            queryset, self.request.query_params,
+            {'status': 'status', 'item': 'item_id', 'category': 'item__category_id', 'user': 'user_id'},
+            date_field='created_at'
+        )
+
+    def list(self, request, *args, **kwargs):
+        # ETag from the requests' and their items' change times (one aggregate query) plus the
+        # content versions of the nested teacher, class, subject and category data, so an unchanged
+        # list is answered with 304 without being serialised
+        return conditional_list(
+            request, self.filter_queryset(self.get_queryset()),
+            lambda: super(RequestViewSet, self).list(request, *args, **kwargs),
+            fields=('updated_at', 'item__updated_at'),
+            extra=[get_version(name) for name in ('categories', 'teachers', 'classes', 'subjects')]
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        # Sparse fieldsets: ?fields=id,status,quantity returns only those columns in lists
+        if self.action == 'list':
+            kwargs.setdefault('fields', get_requested_fields(self.request))
+        return super().get_serializer(*args, **kwargs)
 
     def create(self, request, *args, **kwargs):
         """
@@ -78,28 +116,26 @@ class RequestViewSet(viewsets.ModelViewSet):
             
         serializer.is_valid(raise_exception=True)
         
-        # Use of transactions for data integrity
+        # Use of transactions for data integrity (stock was already checked during validation)
         with transaction.atomic():
             instances = serializer.save(user=user)
             if not isinstance(instances, list):
                 instances = [instances]
-            
-            for instance in instances:
-                # Prevent over-requesting inventory
-                if instance.quantity > instance.item.quantity:
-                    return Response(
-                        {"error": f"Requested quantity exceeds available stock for {instance.item.name}"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
+
+        # Every row shares the same user, so load its profile and classes once for the response
+        prefetch_related_objects(
+            [user],
+            'teacher_profile__teacherclasssubject_set__class_taught',
+            'teacher_profile__teacherclasssubject_set__subject'
+        )
                     
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
-    @action(detail=True, methods=['patch'], permission_classes=[AllowAny])
-    def update_status(self, request, pk=None):
+    def get_stock_manager(self):
         """
-        Updates the status of a request 
-        Only stock managers or admins can perform this.
+        Returns (user, error_response) for actions only stock managers or admins may perform.
+        If the user is not authenticated, defaults to the first stock manager (for development only).
         """
         user = self.request.user
         if not user.is_authenticated:
@@ -107,87 +143,194 @@ class RequestViewSet(viewsets.ModelViewSet):
             try:
                 user = User.objects.filter(role='stock_manager').first() or User.objects.first()
                 if not user:
-                    return Response(
+                    return None, Response(
                         {"error": "No stock managers exist in the database for development"},
                         status=status.HTTP_500_INTERNAL_SERVER_ERROR
                     )
             except User.DoesNotExist:
-                return Response(
+                return None, Response(
                     {"error": "Create at least one user for development"},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
         else:
             # Use properties for object-level checks
             if not user.is_stock_manager and not user.is_admin:
-                return Response(
+                return None, Response(
                     {"error": "Only stock managers can update request status"},
                     status=status.HTTP_403_FORBIDDEN
                 )
+        return user, None
+
+    @action(detail=True, methods=['patch'], permission_classes=[AllowAny])
+    def update_status(self, request, pk=None):
+        """
+        Updates the status of a request 
+        Only stock managers or admins can perform this.
+        """
+        user, error = self.get_stock_manager()
+        if error:
+            return error
             
         request_instance = self.get_object()
+        was_approved = request_instance.status == Request.APPROVED
         serializer = RequestUpdateSerializer(request_instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         
-        with transaction.atomic():
-            serializer.save(stock_manager=user)
-            # Deduct inventory if approved
-            if serializer.data['status'] == Request.APPROVED:
-                if request_instance.quantity > request_instance.item.quantity:
-                    return Response(
-                        {"error": "Not enough items in stock"},
-                        status=status.HTTP_400_BAD_REQUEST
+        try:
+            with transaction.atomic():
+                serializer.save(stock_manager=user)
+                # Deduct inventory when the request becomes approved (row-locked; rolls back the status on failure)
+                if request_instance.status == Request.APPROVED and not was_approved:
+                    deduct_stock(
+                        request_instance.item_id, request_instance.quantity,
+                        changed_by=user, request=request_instance
                     )
-                request_instance.item.quantity -= request_instance.quantity
-                request_instance.item.save()
+        except InsufficientStockError:
+            return Response(
+                {"error": "Not enough items in stock"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
                 
         return Response(serializer.data)
     
     def partial_update(self, request, *args, **kwargs):
         """
-        Allows updating specific fields.
-        If approved, automatically deducts from inventory.
+        Updates the status (and, before approval, the quantity) of a request.
+        When the request becomes approved, its own item and quantity are deducted from inventory.
         """
         instance = self.get_object()
         new_status = request.data.get('status')
-        item_id = request.data.get('item_id')
         quantity = request.data.get('quantity')
+        user = request.user if request.user.is_authenticated else None
 
-        # Update status
-        instance.status = new_status
-        instance.save()
-
-        # If approved, deduct from inventory
-        if new_status == 'approved' and item_id and quantity:
+        if new_status not in dict(Request.STATUS_CHOICES):
+            return Response(
+                {"error": "Status must be 'pending', 'approved' or 'rejected'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        was_approved = instance.status == Request.APPROVED
+        if quantity is not None:
             try:
-                item = InventoryItem.objects.get(id=item_id)
-                if item.quantity >= quantity:
-                    item.quantity -= quantity
-                    item.save()
-                else:
-                    return Response(
-                        {"error": "Not enough items in inventory"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            except InventoryItem.DoesNotExist:
+                quantity = int(quantity)
+            except (TypeError, ValueError):
+                quantity = 0
+            if quantity <= 0:
                 return Response(
-                    {"error": "Item not found"},
-                    status=status.HTTP_404_NOT_FOUND
+                    {"error": "Quantity must be a positive whole number"},
+                    status=status.HTTP_400_BAD_REQUEST
                 )
+            if was_approved and quantity != instance.quantity:
+                return Response(
+                    {"error": "The quantity of an approved request can't be changed"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            instance.quantity = quantity
+
+        try:
+            with transaction.atomic():
+                instance.status = new_status
+                instance.save()
+
+                # Deduct only when the request becomes approved, so repeating the PATCH is harmless
+                # (the status change is rolled back if the deduction fails)
+                if new_status == Request.APPROVED and not was_approved:
+                    deduct_stock(instance.item_id, instance.quantity, changed_by=user, request=instance)
+        except InventoryItem.DoesNotExist:
+            return Response(
+                {"error": "Item not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except InsufficientStockError:
+            return Response(
+                {"error": "Not enough items in inventory"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['post'], permission_classes=[AllowAny])
+    def bulk_update_status(self, request):
+        """
+        Approves or rejects many pending requests in one call.
+        Body: {"ids": [1, 2, 3], "status": "approved" | "rejected"}
+
+        Stock for approvals is deducted per item with the affected items locked once,
+        and the ledger rows and teacher notifications are written in bulk.
+        Returns one outcome per id: approved, rejected, not_found, skipped or insufficient_stock.
+        """
+        user, error = self.get_stock_manager()
+        if error:
+            return error
+
+        ids = request.data.get('ids')
+        new_status = request.data.get('status')
+        if new_status not in (Request.APPROVED, Request.REJECTED):
+            return Response(
+                {"error": "Status must be 'approved' or 'rejected'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            if not isinstance(ids, list):
+                raise TypeError
+            # Remove duplicates but keep the order the ids were sent in
+            ids = list(dict.fromkeys(int(pk) for pk in ids))
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "ids must be a list of request ids"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = {}
+        with transaction.atomic():
+            # Lock the requests (not their joined items) so two managers can't process the same one twice
+            locked = Request.objects.select_for_update(of=('self',)).select_related('item').filter(pk__in=ids)
+            locked = {request_obj.pk: request_obj for request_obj in locked.order_by('pk')}
+
+            pending = []
+            for pk in ids:
+                request_obj = locked.get(pk)
+                if request_obj is None:
+                    results[pk] = {"id": pk, "outcome": "not_found"}
+                elif request_obj.status != Request.PENDING:
+                    results[pk] = {"id": pk, "outcome": "skipped", "error": f"Request is already {request_obj.status}"}
+                else:
+                    pending.append(request_obj)
+
+            if new_status == Request.APPROVED:
+                updated, insufficient = deduct_stock_for_requests(pending, changed_by=user)
+                for request_obj in insufficient:
+                    results[request_obj.pk] = {
+                        "id": request_obj.pk,
+                        "outcome": "insufficient_stock",
+                        "error": f"Not enough {request_obj.item.name} in stock"
+                    }
+            else:
+                updated = pending
+
+            # One UPDATE for every request; signals are skipped, so notifications are queued here
+            Request.objects.filter(pk__in=[request_obj.pk for request_obj in updated]).update(
+                status=new_status, stock_manager=user, updated_at=timezone.now()    # update() skips auto_now
+            )
+            content_type = ContentType.objects.get_for_model(Request)
+            notifications = []
+            for request_obj in updated:
+                request_obj.status = new_status
+                request_obj._previous_status = new_status
+                results[request_obj.pk] = {"id": request_obj.pk, "outcome": new_status}
+                notifications.append(request_status_notification(request_obj, content_type))
+            dispatcher.queue(notification for notification in notifications if notification)
+
+        return Response({"results": [results[pk] for pk in ids]})
+
     @action(detail=True, methods=['patch'])
     def approve(self, request, pk=None):
         """
         Shortcut endpoint to quickly approve a request.
         """
         request_obj = self.get_object()
-        serializer = self.get_serializer(
-            request_obj, 
-            data={'status': 'approved'}, 
-            partial=True
-        )
+        serializer = self.get_serializer(request_obj, data={}, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        # status is read-only on the serializer, so it is passed to save() directly
+        serializer.save(status=Request.APPROVED)
         return Response(serializer.data)
\ No newline at end of file
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requests', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='request',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
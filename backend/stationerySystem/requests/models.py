@@ -4,6 +4,22 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Reusable query logic for requests (chainable from Request.objects)
+class RequestQuerySet(models.QuerySet):
+    def with_details(self):
+        """
+        Joins and prefetches everything RequestSerializer nests (item and category, user,
+        teacher profile and its class/subject rows), so serialising any number of requests
+        takes a fixed number of queries.
+        """
+        return self.select_related(
+            'user__teacher_profile',
+            'item__category'
+        ).prefetch_related(
+            'user__teacher_profile__teacherclasssubject_set__class_taught',
+            'user__teacher_profile__teacherclasssubject_set__subject'
+        )
+
 class Request(models.Model):
     # Constants for request status values
     PENDING = 'pending'
@@ -49,6 +65,20 @@ class Request(models.Model):
 
      # Automatically records request creation timestamp
     created_at = models.DateTimeField(auto_now_add=True)
+
+    # Last change, used as the list endpoint's ETag marker
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = RequestQuerySet.as_manager()
+
+    # Track status before update so signals can detect changes without re-reading
+    _previous_status = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._previous_status = instance.__dict__.get('status')
+        return instance
     
     class Meta:
          # Sorts requests so that newest appear first
@@ -3,18 +3,62 @@ from inventory.models import InventoryItem
 from .models import Request
 from inventory.serializers import InventoryItemSerializer
 from django.db import transaction       # Group A: Used for safe multi-step updates
-from inventory.serializers import InventoryItemSerializer
-from django.db import transaction
+from inventory.services import deduct_stock, InsufficientStockError
 from users.models import User, TeacherProfile, Class
 from users.serializers import UserSerializer, TeacherProfileSerializer
+from stationerySystem.serializers import SparseFieldsetMixin, TimedSerializerMixin
+
 
+class InventoryItemIdField(serializers.PrimaryKeyRelatedField):
+    """
+    Item id field that resolves against items prefetched by RequestListSerializer,
+    so bulk payloads don't run one lookup query per row.
+    """
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched_items')
+        if prefetched is None:
+            return super().to_internal_value(data)
+        try:
+            item = prefetched.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if item is None:
+            self.fail('does_not_exist', pk_value=data)
+        return item
+
+class RequestListSerializer(serializers.ListSerializer):
+    """
+    Bulk request creation: fetches every referenced item in one query,
+    inserts all requests with one bulk_create and notifies stock managers in one batch.
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            item_ids = set()
+            for row in data:
+                try:
+                    item_ids.add(int(row.get('item_id')))
+                except (AttributeError, TypeError, ValueError):
+                    pass    # Reported by the item_id field during validation
+            self.context['prefetched_items'] = InventoryItem.objects.select_related('category').in_bulk(item_ids)
+        return super().to_internal_value(data)
 
-class RequestSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        # Imported here: the notification signals module depends on the request models
+        from notifications.signals import notify_new_requests
+
+        requests = Request.objects.bulk_create([Request(**attrs) for attrs in validated_data])
+        for request_obj in requests:
+            request_obj._previous_status = request_obj.status
+        # bulk_create skips post_save, so the stock managers are notified here
+        notify_new_requests(*requests)
+        return requests
+
+class RequestSerializer(SparseFieldsetMixin, TimedSerializerMixin, serializers.ModelSerializer):
      # Nested serializer for read-only item details
     item = InventoryItemSerializer(read_only=True)
 
     # This handles writing the foreign key reference via ID
-    item_id = serializers.PrimaryKeyRelatedField(
+    item_id = InventoryItemIdField(
         queryset=InventoryItem.objects.all(),  
         source='item',
         write_only=True
@@ -30,6 +74,19 @@ class RequestSerializer(serializers.ModelSerializer):
             'id', 'item', 'item_id', 'quantity', 'status', 'notes', 'created_at',
             'user', 'teacher_profile']
         read_only_fields = ['status', 'created_at']    # Prevent client from modifying these directly
+        list_serializer_class = RequestListSerializer
+
+    def validate(self, data):
+        """
+        Prevent over-requesting inventory, checked before anything is saved.
+        """
+        item = data.get('item')
+        quantity = data.get('quantity')
+        if self.instance is None and item is not None and quantity is not None and quantity > item.quantity:
+            raise serializers.ValidationError(
+                {"quantity": f"Requested quantity exceeds available stock for {item.name}"}
+            )
+        return data
     
     def update(self, instance, validated_data):
         """
@@ -38,25 +95,30 @@ class RequestSerializer(serializers.ModelSerializer):
 
          # Get new status from request (if changing)
         new_status = validated_data.get('status', instance.status)
+        was_approved = instance.status == Request.APPROVED
         
         # Atomic transaction to ensure data consistency
         with transaction.atomic():
             # First update the request status
             instance = super().update(instance, validated_data)
             
-            # If approved, deduct from inventory
-            if new_status == 'approved' and instance.item and instance.quantity:
-                inventory_item = instance.item
-                if inventory_item.quantity < instance.quantity:
+            # If newly approved, deduct from inventory (row-locked, logged in StockLog)
+            if new_status == Request.APPROVED and not was_approved and instance.item_id and instance.quantity:
+                request = self.context.get('request')
+                try:
+                    deduct_stock(
+                        instance.item_id, instance.quantity,
+                        changed_by=request.user if request and request.user.is_authenticated else None,
+                        request=instance
+                    )
+                except InsufficientStockError:
                     raise serializers.ValidationError(
                         {"quantity": "Not enough items in inventory"}
                     )
-                inventory_item.quantity -= instance.quantity
-                inventory_item.save()
             
             return instance
 
-class RequestUpdateSerializer(serializers.ModelSerializer):
+class RequestUpdateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Lightweight serializer used for status-only updates (approve/reject).
     """
@@ -1,3 +1,186 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from inventory.models import Category, InventoryItem, StockLog
+from users.models import User, TeacherProfile, TeacherClassSubject, Class, Subject
+from .models import Request
 
-# Create your tests here.
+
+class RequestListQueryTests(TestCase):
+    url = '/api/requests/requests/'
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Pens')
+        self.item = InventoryItem.objects.create(name='Pen', category=self.category, quantity=100)
+        self.class_taught = Class.objects.create(name='7A', grade_level='7')
+        self.subjects = [Subject.objects.create(name=f'Subject {i}') for i in range(2)]
+
+    def create_requests(self, count, offset=0):
+        for i in range(offset, offset + count):
+            teacher = User.objects.create_user(email=f'teacher{i}@school.test', password='pass', role='teacher')
+            profile = TeacherProfile.objects.create(user=teacher)
+            for subject in self.subjects:
+                TeacherClassSubject.objects.create(teacher=profile, class_taught=self.class_taught, subject=subject)
+            Request.objects.create(item=self.item, quantity=1, user=teacher)
+
+    def test_list_includes_nested_details(self):
+        self.create_requests(1)
+        data = self.client.get(self.url).json()
+        self.assertEqual(data[0]['item']['category']['name'], 'Pens')
+        self.assertEqual(len(data[0]['teacher_profile']['class_subjects']), 2)
+
+    def test_query_count_does_not_grow_with_requests(self):
+        self.create_requests(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+
+        self.create_requests(10, offset=2)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(response.json()), 12)
+        self.assertEqual(len(small), len(large))
+
+
+class BulkUpdateStatusTests(TestCase):
+    url = '/api/requests/requests/bulk_update_status/'
+
+    def setUp(self):
+        self.manager = User.objects.create_user(email='manager@school.test', password='pass', role='stock_manager')
+        self.teacher = User.objects.create_user(email='teacher@school.test', password='pass', role='teacher')
+        category = Category.objects.create(name='Pens')
+        self.pens = InventoryItem.objects.create(name='Pen', category=category, quantity=10)
+        self.paper = InventoryItem.objects.create(name='Paper', category=category, quantity=3)
+
+    def post(self, ids, new_status):
+        return self.client.post(self.url, {'ids': ids, 'status': new_status}, content_type='application/json')
+
+    def test_bulk_approve_deducts_per_item_and_reports_outcomes(self):
+        # Notifications are written when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            first = Request.objects.create(item=self.pens, quantity=4, user=self.teacher)
+            second = Request.objects.create(item=self.pens, quantity=5, user=self.teacher)
+            too_many = Request.objects.create(item=self.paper, quantity=4, user=self.teacher)
+            response = self.post([first.pk, second.pk, too_many.pk, 9999], 'approved')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result['outcome'] for result in response.json()['results']],
+            ['approved', 'approved', 'insufficient_stock', 'not_found']
+        )
+        self.pens.refresh_from_db()
+        self.assertEqual((self.pens.quantity, self.pens.status), (1, 'low_stock'))
+        self.assertEqual(StockLog.objects.filter(item=self.pens, request__isnull=False).count(), 2)
+        self.assertEqual(Request.objects.get(pk=too_many.pk).status, Request.PENDING)
+        self.assertEqual(self.teacher.notifications.filter(notification_type='REQUEST_STATUS').count(), 2)
+        self.assertEqual(self.manager.notifications.filter(notification_type='LOW_STOCK').count(), 1)
+
+    def test_already_processed_requests_are_skipped(self):
+        done = Request.objects.create(item=self.pens, quantity=1, user=self.teacher, status=Request.APPROVED)
+        response = self.post([done.pk], 'rejected')
+        self.assertEqual(response.json()['results'][0]['outcome'], 'skipped')
+        self.assertEqual(Request.objects.get(pk=done.pk).status, Request.APPROVED)
+
+
+class BulkCreateRequestTests(TestCase):
+    url = '/api/requests/requests/'
+
+    def setUp(self):
+        self.manager = User.objects.create_user(email='manager@school.test', password='pass', role='stock_manager')
+        self.teacher = User.objects.create_user(email='teacher@school.test', password='pass', role='teacher')
+        TeacherProfile.objects.create(user=self.teacher)
+        category = Category.objects.create(name='Pens')
+        self.items = [
+            InventoryItem.objects.create(name=f'Item {i}', category=category, quantity=10) for i in range(12)
+        ]
+        self.client.force_login(self.teacher)
+
+    def post(self, payload):
+        return self.client.post(self.url, payload, content_type='application/json')
+
+    def test_bulk_create_inserts_rows_and_notifies_managers(self):
+        payload = [{'item_id': item.pk, 'quantity': 2} for item in self.items[:3]]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post(payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 3)
+        self.assertEqual(Request.objects.filter(user=self.teacher).count(), 3)
+        self.assertEqual(self.manager.notifications.filter(notification_type='NEW_REQUEST').count(), 3)
+
+    def test_over_stock_rejects_whole_batch_before_saving(self):
+        payload = [{'item_id': self.items[0].pk, 'quantity': 2}, {'item_id': self.items[1].pk, 'quantity': 50}]
+        response = self.post(payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Request.objects.exists())
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        with CaptureQueriesContext(connection) as small:
+            self.post([{'item_id': item.pk, 'quantity': 1} for item in self.items[:2]])
+        with CaptureQueriesContext(connection) as large:
+            self.post([{'item_id': item.pk, 'quantity': 1} for item in self.items])
+        self.assertEqual(len(small), len(large))
+
+
+class RequestListConditionalTests(TestCase):
+    url = '/api/requests/requests/'
+
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(email='manager@school.test', password='pass', role='stock_manager')
+        self.teacher = User.objects.create_user(email='teacher@school.test', password='pass', role='teacher')
+        item = InventoryItem.objects.create(name='Pen', category=Category.objects.create(name='Pens'), quantity=10)
+        self.request = Request.objects.create(item=item, quantity=2, user=self.teacher)
+
+    def test_status_change_invalidates_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.post(
+            '/api/requests/requests/bulk_update_status/',
+            {'ids': [self.request.pk], 'status': 'rejected'}, content_type='application/json'
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['status'], 'rejected')
+
+    def test_etag_survives_another_worker_or_expired_cache(self):
+        etag = self.client.get(self.url)['ETag']
+        cache.clear()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_renaming_the_teacher_invalidates_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teacher.first_name = 'Grace'
+            self.teacher.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['user']['first_name'], 'Grace')
+
+
+class PartialUpdateTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(email='teacher@school.test', password='pass', role='teacher')
+        self.item = InventoryItem.objects.create(name='Pen', category=Category.objects.create(name='Pens'), quantity=100)
+        self.other = InventoryItem.objects.create(name='Paper', category=self.item.category, quantity=100)
+        self.request = Request.objects.create(item=self.item, quantity=5, user=self.teacher)
+        self.url = f'/api/requests/requests/{self.request.pk}/'
+
+    def patch(self, data):
+        return self.client.patch(self.url, data, content_type='application/json')
+
+    def test_repeated_approval_deducts_once_from_the_requests_own_item(self):
+        for _ in range(2):
+            response = self.patch({'status': 'approved', 'item_id': self.other.pk, 'quantity': 5})
+            self.assertEqual(response.status_code, 200)
+        self.item.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.other.quantity), (95, 100))
+
+    def test_invalid_input_is_rejected(self):
+        self.assertEqual(self.patch({}).status_code, 400)
+        self.assertEqual(self.patch({'status': 'approved', 'quantity': 'abc'}).status_code, 400)
+        self.assertEqual(self.patch({'status': 'approved', 'quantity': 0}).status_code, 400)
+        self.request.refresh_from_db()
+        self.assertEqual(self.request.status, Request.PENDING)
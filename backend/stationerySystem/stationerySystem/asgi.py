@@ -2,6 +2,9 @@
 ASGI config for stationerySystem project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve through this (e.g. ``uvicorn stationerySystem.asgi:application``) so the
+notification stream at /api/notifications/stream/ can hold many open connections
+per worker.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
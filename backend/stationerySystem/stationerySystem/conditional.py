@@ -0,0 +1,55 @@
+"""
+Conditional GET for list endpoints.
+
+A list's ETag comes from one aggregate query over the filtered queryset (newest change
+timestamp and row count), so a client that already has the current list gets a 304
+before anything is fetched or serialised. The count catches deletions, which leave the
+newest timestamp unchanged.
+
+No Last-Modified is sent: a timestamp alone can't express a deletion, so clients that
+only sent If-Modified-Since would keep a list with rows that no longer exist.
+"""
+
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+
+
+def list_etag(request, queryset, fields=('updated_at',), extra=()):
+    """
+    Returns the ETag of a filtered list queryset.
+
+    `fields` are the change timestamps to watch, including those of nested rows the list
+    serialises (e.g. 'item__updated_at'). The ETag also covers the query string (filters,
+    ?fields=, cursors), the user (role filtering) and any `extra` markers, e.g. the
+    content versions of nested reference data that has no timestamp of its own. Markers
+    must be derived from the data, so every worker gives an unchanged list the same ETag.
+    """
+    state = queryset.order_by().aggregate(
+        count=Count('pk'), **{f'latest_{i}': Max(field) for i, field in enumerate(fields)}
+    )
+    changes = [state[f'latest_{i}'] for i in range(len(fields)) if state[f'latest_{i}']]
+    latest = max(changes) if changes else None
+    parts = [
+        request.get_full_path(),
+        str(request.user.pk),
+        latest.isoformat() if latest else '',
+        str(state['count']),
+        *map(str, extra),
+    ]
+    return '"%s"' % hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def conditional_list(request, queryset, build_response, fields=('updated_at',), extra=()):
+    """
+    Answers 304 Not Modified when the client's If-None-Match still matches the list;
+    otherwise calls build_response() and adds the ETag.
+    """
+    etag = list_etag(request, queryset, fields, extra)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    response = build_response()
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,56 @@
+"""
+Shared query-parameter filtering for list endpoints.
+Every filter is applied to the queryset, so it runs in SQL rather than in Python.
+"""
+
+from datetime import datetime, time, timedelta
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.dateparse import parse_date
+from django.utils.timezone import make_aware
+from rest_framework.exceptions import ValidationError
+
+
+def filter_by_params(queryset, params, lookups, date_field=None):
+    """
+    Filters a queryset from request query parameters.
+
+    - `lookups` maps a query parameter to the field lookup it filters on,
+      e.g. {'status': 'status', 'category': 'category_id'}.
+    - `date_field` enables ?start_date= and ?end_date= (YYYY-MM-DD, both inclusive) on that field.
+
+    Invalid values raise a DRF ValidationError, which is returned to the client as a 400.
+    """
+    for param, lookup in lookups.items():
+        value = params.get(param)
+        if value in (None, ''):
+            continue
+        try:
+            queryset = queryset.filter(**{lookup: value})
+        except (ValueError, TypeError, DjangoValidationError):
+            raise ValidationError({param: f"Invalid value '{value}'."})
+
+    if date_field:
+        start_date = parse_date_param(params, 'start_date')
+        end_date = parse_date_param(params, 'end_date')
+        if start_date:
+            queryset = queryset.filter(**{f'{date_field}__gte': make_aware(datetime.combine(start_date, time.min))})
+        if end_date:
+            # Compare against the start of the next day so the whole end date is included
+            # and the column index can still be used (no __date transform)
+            next_day = make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+            queryset = queryset.filter(**{f'{date_field}__lt': next_day})
+
+    return queryset
+
+
+def parse_date_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Invalid date format, expected YYYY-MM-DD."})
+    return parsed
@@ -0,0 +1,62 @@
+"""
+Reading rows for the bulk import endpoints and commands.
+
+Imports accept a JSON list of objects or a CSV file with a header row; either way the
+importer gets a list of dicts keyed by field name. Over the API the rows can be posted
+as a JSON body or uploaded as a file in the "file" field.
+"""
+
+import csv
+import io
+import json
+from rest_framework import status
+
+
+def guess_format(filename):
+    return 'json' if filename.lower().endswith('.json') else 'csv'
+
+
+def parse_rows(text, fmt):
+    """List of row dicts from JSON or CSV text (CSV cells are stripped strings)."""
+    if fmt == 'json':
+        rows = json.loads(text)
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("Expected a JSON list of objects.")
+        return rows
+    if fmt == 'csv':
+        return [
+            {key.strip(): (value or '').strip() for key, value in row.items() if key}
+            for row in csv.DictReader(io.StringIO(text))
+        ]
+    raise ValueError(f"Unsupported format '{fmt}', use csv or json.")
+
+
+def rows_from_request(request, key):
+    """
+    Rows from an uploaded "file", a JSON list body, or a body with the list under `key`.
+    Raises ValueError when none of these is usable.
+    """
+    upload = request.FILES.get('file')
+    if upload:
+        try:
+            return parse_rows(upload.read().decode('utf-8-sig'), guess_format(upload.name))
+        except UnicodeDecodeError:
+            raise ValueError("The file must be UTF-8 encoded.")
+
+    rows = request.data if isinstance(request.data, list) else request.data.get(key)
+    if not isinstance(rows, list):
+        raise ValueError(f"Send a list of {key} or upload a CSV/JSON file.")
+    return rows
+
+
+def is_dry_run(request):
+    return str(request.query_params.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+
+
+def import_status(written, errors):
+    """201 when rows were written, 400 when every row was rejected, otherwise 200 (dry runs, no-ops)."""
+    if written:
+        return status.HTTP_201_CREATED
+    if errors:
+        return status.HTTP_400_BAD_REQUEST
+    return status.HTTP_200_OK
@@ -0,0 +1,259 @@
+"""
+Per-endpoint request instrumentation.
+
+RequestMetricsMiddleware measures every request's SQL query count, database time,
+serialisation time, response rendering time and total latency. It adds them to the
+response as a Server-Timing header (visible in the browser dev tools), aggregates them
+per route in process memory for GET /api/metrics/, and logs requests that exceed the
+budgets in settings.REQUEST_METRICS.
+
+"serialize" is the time serializers spend in to_representation, minus the queries it ran,
+which count as "db". Serializers opt in with stationerySystem.serializers.TimedSerializerMixin
+(or any code with the timed_serialization() block). The "render" phase covers the DRF renderer (JSON
+encoding) after the view has returned; "app" is the rest of the view and middleware.
+
+The middleware works in both sync and async stacks. Timings live in a context variable,
+so they follow the request into sync_to_async threads.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGETS = {
+    'QUERY_BUDGET': 50,         # Queries per request before it is logged
+    'TIME_BUDGET_MS': 500,      # Total latency per request before it is logged
+}
+
+# Latest latencies kept per route for the percentiles
+LATENCY_SAMPLE_SIZE = 500
+
+
+def get_budgets():
+    return {**DEFAULT_BUDGETS, **getattr(settings, 'REQUEST_METRICS', {})}
+
+
+class QueryTimer:
+    """Queries, database time and serialisation time of one request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.serialize_db_time = 0.0    # Queries run lazily while serialising
+        self.serializing = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += elapsed
+            if self.serializing:
+                self.serialize_db_time += elapsed
+
+
+# Timer of the request being handled (None outside the middleware)
+current_timer = contextvars.ContextVar('request_metrics_timer', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timer(connection, **kwargs):
+    """
+    Adds record_query to a database connection once. Connections are per thread, so
+    this runs for every new connection instead of wrapping them per request.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_timer, dispatch_uid='request-metrics-query-timer')
+
+
+@contextmanager
+def timed_serialization():
+    """Counts the block as the current request's "serialize" phase; nested blocks count once."""
+    timer = current_timer.get()
+    if timer is None:
+        yield
+        return
+    timer.serializing += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.serializing -= 1
+        if not timer.serializing:
+            timer.serialize_time += time.perf_counter() - started
+
+
+class MetricsStore:
+    """In-process per-route aggregates (each worker process keeps its own)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._routes = defaultdict(lambda: {
+                'requests': 0, 'errors': 0, 'over_budget': 0,
+                'total_ms': 0.0, 'max_ms': 0.0, 'db_ms': 0.0, 'serialize_ms': 0.0, 'render_ms': 0.0,
+                'queries': 0, 'max_queries': 0,
+                'latencies': deque(maxlen=LATENCY_SAMPLE_SIZE),
+            })
+
+    def record(self, route, total_ms, db_ms, serialize_ms, render_ms, queries, status_code, over_budget):
+        with self._lock:
+            entry = self._routes[route]
+            entry['requests'] += 1
+            entry['errors'] += status_code >= 500
+            entry['over_budget'] += over_budget
+            entry['total_ms'] += total_ms
+            entry['max_ms'] = max(entry['max_ms'], total_ms)
+            entry['db_ms'] += db_ms
+            entry['serialize_ms'] += serialize_ms
+            entry['render_ms'] += render_ms
+            entry['queries'] += queries
+            entry['max_queries'] = max(entry['max_queries'], queries)
+            entry['latencies'].append(total_ms)
+
+    def snapshot(self):
+        with self._lock:
+            routes = {route: dict(entry, latencies=sorted(entry['latencies'])) for route, entry in self._routes.items()}
+
+        summary = {}
+        for route, entry in sorted(routes.items()):
+            count, latencies = entry['requests'], entry['latencies']
+            percentile = lambda p: round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 2)
+            summary[route] = {
+                'requests': count,
+                'errors': entry['errors'],
+                'over_budget': entry['over_budget'],
+                'avg_ms': round(entry['total_ms'] / count, 2),
+                'p50_ms': percentile(0.5),
+                'p95_ms': percentile(0.95),
+                'max_ms': round(entry['max_ms'], 2),
+                'avg_db_ms': round(entry['db_ms'] / count, 2),
+                'avg_serialize_ms': round(entry['serialize_ms'] / count, 2),
+                'avg_render_ms': round(entry['render_ms'] / count, 2),
+                'avg_queries': round(entry['queries'] / count, 2),
+                'max_queries': entry['max_queries'],
+            }
+        return summary
+
+
+metrics = MetricsStore()
+
+
+@sync_and_async_middleware
+class RequestMetricsMiddleware:
+    """Keep first in MIDDLEWARE so the total covers the rest of the stack."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported missed connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer, token, started = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer, started)
+
+    async def __acall__(self, request):
+        timer, token, started = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer, started)
+
+    def start(self, request):
+        timer = QueryTimer()
+        request._render_started = None
+        return timer, current_timer.set(timer), time.perf_counter()
+
+    def finish(self, request, response, timer, started):
+        finished = time.perf_counter()
+        total_ms = (finished - started) * 1000
+        db_ms = timer.db_time * 1000
+        serialize_ms = max(timer.serialize_time - timer.serialize_db_time, 0.0) * 1000
+        render_ms = (finished - request._render_started) * 1000 if request._render_started else 0.0
+        app_ms = max(total_ms - db_ms - serialize_ms - render_ms, 0.0)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db_ms:.1f};desc="{timer.queries} queries"',
+            f'serialize;dur={serialize_ms:.1f}',
+            f'app;dur={app_ms:.1f}',
+            f'render;dur={render_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        match = request.resolver_match
+        route = f"{request.method} /{match.route}" if match else f"{request.method} (unresolved)"
+        budgets = get_budgets()
+        over_budget = timer.queries > budgets['QUERY_BUDGET'] or total_ms > budgets['TIME_BUDGET_MS']
+        if over_budget:
+            # Path only: query strings can carry tokens (e.g. the notification stream)
+            logger.warning(
+                "%s %s exceeded its budget: %d queries, %.1f ms (db %.1f ms, serialize %.1f ms, render %.1f ms)",
+                request.method, request.path, timer.queries, total_ms, db_ms, serialize_ms, render_ms
+            )
+        metrics.record(route, total_ms, db_ms, serialize_ms, render_ms, timer.queries, response.status_code, over_budget)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called just before DRF responses are rendered
+        request._render_started = time.perf_counter()
+        return response
+
+
+class MetricsView(APIView):
+    """
+    GET returns the per-route aggregates of this worker process; DELETE resets them.
+    Admins only.
+    """
+
+    def check_admin(self, request):
+        user = request.user
+        return user.is_authenticated and (user.is_staff or user.role == 'admin')
+
+    def get(self, request):
+        if not self.check_admin(request):
+            return Response({"error": "Admins only"}, status=status.HTTP_403_FORBIDDEN)
+        return Response({'budgets': get_budgets(), 'routes': metrics.snapshot()})
+
+    def delete(self, request):
+        if not self.check_admin(request):
+            return Response({"error": "Admins only"}, status=status.HTTP_403_FORBIDDEN)
+        metrics.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,108 @@
+"""
+Shared pagination for list endpoints.
+
+Pagination is opt-in so existing dashboards that expect a plain list keep working:
+a response is only paginated when the client sends ?page_size= or a ?cursor= from a previous page.
+"""
+
+import base64
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class OptionalCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-created_at', '-id')   # Newest first, id breaks ties between equal timestamps
+
+    def get_page_size(self, request):
+        # Only paginate when the client asks for it
+        if self.page_size_query_param not in request.query_params and \
+           self.cursor_query_param not in request.query_params:
+            return None
+        return super().get_page_size(request)
+
+
+def paginate(queryset, request, view, serializer_class, **serializer_kwargs):
+    """
+    Helper for plain APIViews: serialises a queryset and returns a Response,
+    paginated with OptionalCursorPagination when the client asked for a page.
+    """
+    paginator = OptionalCursorPagination()
+    page = paginator.paginate_queryset(queryset, request, view=view)
+    if page is None:
+        return Response(serializer_class(queryset, many=True, **serializer_kwargs).data)
+    return paginator.get_paginated_response(serializer_class(page, many=True, **serializer_kwargs).data)
+
+
+# ---- Keyset feeds ----
+# For clients that poll: ?since= returns only rows newer than what they already have,
+# ?before= pages back through history. Cursors are opaque (timestamp, id) pairs.
+
+FEED_PAGE_SIZE = 50
+FEED_MAX_PAGE_SIZE = 200
+
+
+def encode_feed_cursor(timestamp, pk):
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{pk}".encode()).decode()
+
+
+def decode_feed_cursor(value, param):
+    try:
+        timestamp, pk = base64.urlsafe_b64decode(value.encode()).decode().split('|')
+        timestamp, pk = parse_datetime(timestamp), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        timestamp = None
+    if timestamp is None:
+        raise ValidationError({param: "Invalid cursor."})
+    return timestamp, pk
+
+
+def keyset_feed(queryset, params, field):
+    """
+    Slices a queryset by a (field, id) keyset instead of an offset, so each page is an
+    index range scan no matter how much history there is.
+
+    - ?since=<cursor>  rows after the cursor, oldest first up to the limit (a client
+      that fell far behind keeps polling with `latest` until has_more is false)
+    - ?before=<cursor> rows before the cursor, newest first (scrolling back)
+    - neither          the newest rows
+    - ?limit=          page size, FEED_PAGE_SIZE by default
+
+    Returns (rows, meta); rows are always newest first, meta holds the cursors to use next.
+    """
+    try:
+        limit = min(int(params.get('limit', FEED_PAGE_SIZE)), FEED_MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValidationError({'limit': "Must be a number."})
+    if limit < 1:
+        raise ValidationError({'limit': "Must be at least 1."})
+
+    since, before = params.get('since'), params.get('before')
+    if since:
+        timestamp, pk = decode_feed_cursor(since, 'since')
+        queryset = queryset.filter(Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk}))
+        rows = list(queryset.order_by(field, 'id')[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+    else:
+        if before:
+            timestamp, pk = decode_feed_cursor(before, 'before')
+            queryset = queryset.filter(Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk}))
+        rows = list(queryset.order_by(f'-{field}', '-id')[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+    cursor = lambda row: encode_feed_cursor(getattr(row, field), row.pk)
+    meta = {
+        # Poll with ?since=latest next time; unchanged when nothing new arrived
+        'latest': cursor(rows[0]) if rows else since,
+        # Scroll back with ?before=oldest
+        'oldest': cursor(rows[-1]) if rows else before,
+        'has_more': has_more,
+    }
+    return rows, meta
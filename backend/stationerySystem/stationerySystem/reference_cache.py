@@ -0,0 +1,102 @@
+"""
+Read-through cache for reference data (categories, classes, subjects, content types).
+
+Each data set is registered with a build() function and the models it is read from. The
+payload is cached together with its version, a hash of its content, so every worker and
+every rebuild of unchanged data arrives at the same version. The version doubles as the
+list endpoint's ETag, so clients holding the current data get a 304 without it being
+rebuilt, whichever worker answers.
+
+Saving or deleting one of the models deletes the cached payload once the transaction
+commits; the next read rebuilds it. Writes that skip model signals (queryset.update(),
+bulk_create) must call invalidate().
+
+A deletion only reaches the workers that share the cache. With the default per-process
+local-memory cache, other workers keep serving their copy until it expires after
+settings.REFERENCE_CACHE_TIMEOUT seconds (60 by default): that is how stale another worker
+can be. Expiry costs one rebuild, not the clients' 304s, since unchanged data hashes to
+the same version. With a shared backend (Redis, Memcached) the timeout can be raised.
+"""
+
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from rest_framework import status
+from rest_framework.response import Response
+
+# Bounds staleness across workers that don't share the cache (see above)
+DEFAULT_REFERENCE_CACHE_TIMEOUT = 60
+
+# Data set name -> build() returning its payload
+sources = {}
+
+
+def get_timeout():
+    return getattr(settings, 'REFERENCE_CACHE_TIMEOUT', DEFAULT_REFERENCE_CACHE_TIMEOUT)
+
+
+def payload_key(name):
+    return f'refdata:{name}'
+
+
+def content_version(data):
+    """Hash of a payload; the same data gives the same version in every process."""
+    return hashlib.md5(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def register(name, build, *models):
+    """
+    Registers a data set. build() must return JSON-like, picklable data (serializer .data
+    is); saving or deleting any of the models invalidates it.
+    """
+    sources[name] = build
+
+    def handler(sender, **kwargs):
+        invalidate(name)
+
+    for model in models:
+        for signal in (post_save, post_delete):
+            signal.connect(handler, sender=model, weak=False, dispatch_uid=f'refdata:{name}:{model._meta.label}')
+
+
+def invalidate(name):
+    """Drops a data set's cached payload once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(payload_key(name)))
+
+
+def get_reference_data(name):
+    """Returns (data, version) for a data set, building it only on a cache miss."""
+    cached = cache.get(payload_key(name))
+    if cached is None:
+        data = sources[name]()
+        cached = (data, content_version(data))
+        cache.set(payload_key(name), cached, get_timeout())
+    return cached
+
+
+def get_version(name):
+    return get_reference_data(name)[1]
+
+
+def reference_response(request, name):
+    """
+    Response for a reference list endpoint, with an ETag of the data set's version.
+    Answers 304 Not Modified when the client already has that version.
+    """
+    data, version = get_reference_data(name)
+    etag = f'"{name}-{version}"'
+    sent = [tag.strip().removeprefix('W/') for tag in request.headers.get('If-None-Match', '').split(',')]
+    if etag in sent or '*' in sent:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    return Response(data, headers={'ETag': etag})
+
+
+def get_content_type_id(model_name):
+    """
+    Cached replacement for ContentType.objects.get(model=model_name).id; None for unknown models.
+    """
+    ids, _ = get_reference_data('content_types')
+    return ids.get(model_name)
@@ -0,0 +1,43 @@
+"""
+Shared serializer helpers.
+"""
+
+from .metrics import timed_serialization
+
+
+class TimedSerializerMixin:
+    """
+    Reports the time spent building representations as the request's "serialize" phase
+    in the metrics (Server-Timing, /api/metrics/). Also covers lists of the serializer,
+    since ListSerializer builds each item with the child's to_representation.
+    """
+
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+
+class SparseFieldsetMixin:
+    """
+    Lets a serializer return only the fields a client asked for.
+
+    Pass fields=['id', 'name'] when creating the serializer (views read it from ?fields=id,name).
+    Unknown names are ignored; when no fields are given, every field is returned.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def get_requested_fields(request):
+    """
+    Parses ?fields=a,b,c into a list (None when the parameter is absent).
+    """
+    value = request.query_params.get('fields')
+    if not value:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
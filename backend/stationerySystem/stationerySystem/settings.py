@@ -36,7 +36,7 @@ SIMPLE_JWT = {
 # REST Framework settings (applies default security & authentication globally)
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',   # JWT, with the user resolved from a short-lived cache
     ], 
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated', # All endpoints require authentication by default
@@ -77,8 +77,9 @@ INSTALLED_APPS = [
     'corsheaders',
 ]
 
-# Middleware (keeps the order required by Django, CORS middleware goes first)
+# Middleware (keeps the order required by Django, CORS middleware goes first after the metrics one)
 MIDDLEWARE = [
+    'stationerySystem.metrics.RequestMetricsMiddleware',   # First, so its timings cover the whole stack
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -122,6 +123,31 @@ DATABASES = {
     }
 }
 
+# Cache (holds the per-user unread notification counters)
+# Local memory is per-process; with several workers switch to a shared backend, e.g.
+# 'django.core.cache.backends.redis.RedisCache' with 'LOCATION': 'redis://127.0.0.1:6379'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'stationery-system',
+    }
+}
+
+# Seconds cached reference data (categories, classes, subjects) lives. A change invalidates it
+# at once only in workers sharing the cache, so with the per-process cache above this is how
+# stale other workers can be; raise it with a shared backend
+REFERENCE_CACHE_TIMEOUT = 60
+
+# Repeated low-stock alerts for the same item refresh the recipient's unread alert
+# instead of adding a new row when it is younger than this (None disables coalescing)
+NOTIFICATION_COALESCE_WINDOW = timedelta(hours=1)
+
+# Requests over either budget are logged by RequestMetricsMiddleware (see GET /api/metrics/)
+REQUEST_METRICS = {
+    'QUERY_BUDGET': 50,
+    'TIME_BUDGET_MS': 500,
+}
+
 # Password validators (boilerplate)
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
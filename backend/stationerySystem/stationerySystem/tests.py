@@ -0,0 +1,68 @@
+import re
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from inventory.models import Category, InventoryItem
+from users.models import User
+from .metrics import metrics
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        category = Category.objects.create(name='Pens')
+        InventoryItem.objects.create(name='Pen', category=category, quantity=10)
+
+    def test_server_timing_and_per_route_aggregates(self):
+        response = self.client.get('/api/inventory/inventory/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, app;dur=[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+$')
+
+        admin = User.objects.create_user(email='admin@school.test', password='pass', role='admin')
+        token = RefreshToken.for_user(admin).access_token
+        routes = self.client.get('/api/metrics/', HTTP_AUTHORIZATION=f'Bearer {token}').json()['routes']
+        entry = routes['GET /api/inventory/inventory/']
+        self.assertEqual(entry['requests'], 1)
+        self.assertGreater(entry['avg_queries'], 0)
+
+    def test_serialisation_is_timed_separately(self):
+        self.client.get('/api/inventory/inventory/')
+        entry = metrics.snapshot()['GET /api/inventory/inventory/']
+        self.assertGreater(entry['avg_serialize_ms'], 0)
+
+    async def test_async_stack_is_measured(self):
+        response = await self.async_client.get('/api/inventory/inventory/')
+        self.assertEqual(response.status_code, 200)
+        queries = int(re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1))
+        self.assertGreater(queries, 0)
+
+    def test_metrics_endpoint_is_admin_only(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+
+    @override_settings(REQUEST_METRICS={'QUERY_BUDGET': 0})
+    def test_requests_over_budget_are_logged(self):
+        with self.assertLogs('stationerySystem.metrics', level='WARNING') as logs:
+            self.client.get('/api/inventory/inventory/')
+        self.assertIn('exceeded its budget', logs.output[0])
+
+
+@override_settings(REFERENCE_CACHE_TIMEOUT=60)
+class ReferenceCacheTimeoutTests(TestCase):
+    url = '/api/inventory/categories/'
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Pens')
+
+    def test_change_missed_by_this_worker_is_picked_up_after_the_timeout(self):
+        etag = self.client.get(self.url)['ETag']
+        # Another worker's write: its invalidation never reaches this process' cache
+        Category.objects.filter(pk=self.category.pk).update(name='Pencils')
+        self.assertEqual(self.client.get(self.url).json()[0]['name'], 'Pens')
+
+        later = time.time() + 61
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['name'], 'Pencils')
@@ -11,6 +11,7 @@ It uses Django's include() function to keep each app modular.
 from django.contrib import admin
 from django.urls import path, include
 from django.http import HttpResponse  # Used to return a simple HTML response
+from .metrics import MetricsView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,   # Get access and refresh token
     TokenRefreshView,      # Refresh access token using refresh token
@@ -36,5 +37,8 @@ urlpatterns = [
     path('api/users/', include('users.urls')),          # User registration/login
     path('api/', include('notifications.urls')),        # Notifications   
     path('api/', include('reports.urls')),              # Report generation
+
+    # Per-route query count and latency aggregates (admins only)
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
 ]
 
@@ -5,8 +5,19 @@ from rest_framework import status, generics
 from django.core.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import get_user_model, authenticate
+from django.db import IntegrityError
+from django.db.models import Count, F, Prefetch, Q, prefetch_related_objects
 from rest_framework_simplejwt.tokens import RefreshToken
+from stationerySystem.imports import import_status, is_dry_run, rows_from_request
+from stationerySystem.reference_cache import reference_response
+from inventory.models import InventoryItem, TeacherInventoryItem
+from notifications.api import notifications_for
+from notifications.counters import get_unread_count
+from notifications.serializers import NotificationSerializer
+from reports.api import get_report_stats
+from requests.models import Request
 from .models import TeacherProfile, TeacherClassSubject, Class, Subject
+from .onboarding import import_teachers
 from .serializers import (
     ClassSerializer,
     SubjectSerializer,
@@ -17,6 +28,34 @@ from .serializers import (
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Latest notifications included in the session bootstrap
+BOOTSTRAP_NOTIFICATIONS = 10
+
+
+def get_profile_data(user):
+    """
+    Serialised teacher profile (None for other roles), with the class/subject rows
+    loaded in one prefetch query instead of one query per row.
+    """
+    if not user.is_teacher or not hasattr(user, 'teacher_profile'):
+        return None
+    profile = user.teacher_profile
+    prefetch_related_objects([profile], Prefetch(
+        'teacherclasssubject_set',
+        queryset=TeacherClassSubject.objects.select_related('class_taught', 'subject')
+    ))
+    return TeacherProfileSerializer(profile).data
+
+
+def get_user_data(user):
+    return {
+        "id": user.id,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "role": user.role,
+    }
+
 class SignUpView(APIView):
     permission_classes = [AllowAny]
 
@@ -100,6 +139,37 @@ class SignUpView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class TeacherImportView(APIView):
+    """
+    Bulk onboarding for admins: a JSON list of signup payloads, or a CSV/JSON file
+    uploaded as "file". Valid rows are created, invalid ones come back as per-row errors.
+    Pass dry_run=true to only validate.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not request.user.is_admin and not request.user.is_staff:
+            return Response(
+                {"error": "Only admins can import teachers."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            rows = rows_from_request(request, 'teachers')
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = import_teachers(rows, dry_run=is_dry_run(request))
+        except IntegrityError:
+            # Another request registered one of the emails after validation
+            return Response(
+                {"error": "Some of these teachers were created meanwhile, please retry the import."},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response(result, status=import_status(result['created'], result['errors']))
+
 class LoginView(APIView):
     permission_classes = [AllowAny]
     
@@ -132,18 +202,11 @@ class LoginView(APIView):
 
         # Server-side generation of authentication tokens (JWT)
         refresh = RefreshToken.for_user(user)
-        serializer = TeacherProfileSerializer(user.teacher_profile) if user.is_teacher else None
         return Response(
             {
                 "message": "Login successful",
-                "user": {
-                    "id": user.id,
-                    "email": user.email,
-                    "first_name": user.first_name,
-                    "last_name": user.last_name,
-                    "role": user.role,
-                },
-                "profile": serializer.data if serializer else None,
+                "user": get_user_data(user),
+                "profile": get_profile_data(user),
                 "tokens": {
                     "refresh": str(refresh),
                     "access": str(refresh.access_token),
@@ -152,12 +215,61 @@ class LoginView(APIView):
             status=status.HTTP_200_OK
         )
     
+class SessionBootstrapView(APIView):
+    """
+    Everything the frontend loads after login in one response: user, teacher profile,
+    unread count, latest notifications and a role-specific dashboard summary.
+    Each part is a fixed number of queries, whatever the amount of data.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        notifications = notifications_for(user)[:BOOTSTRAP_NOTIFICATIONS]
+        return Response({
+            "user": get_user_data(user),
+            "profile": get_profile_data(user),
+            "unread_count": get_unread_count(user.id),
+            "notifications": NotificationSerializer(notifications, many=True).data,
+            "dashboard": self.get_dashboard(user),
+        })
+
+    def get_dashboard(self, user):
+        if user.is_teacher:
+            # Own requests by status, and the assigned items running low (one query each)
+            return {
+                "requests": Request.objects.filter(user=user).aggregate(
+                    total=Count('id'),
+                    pending=Count('id', filter=Q(status=Request.PENDING)),
+                    approved=Count('id', filter=Q(status=Request.APPROVED)),
+                    rejected=Count('id', filter=Q(status=Request.REJECTED)),
+                ),
+                "assigned_items": TeacherInventoryItem.objects.filter(teacher=user).aggregate(
+                    total=Count('id'),
+                    low_stock=Count('id', filter=Q(quantity__lte=F('item__low_stock_threshold'))),
+                ),
+            }
+
+        # Stock managers and admins: inventory health, the review queue and what needs restocking
+        low_stock = InventoryItem.objects.exclude(status='in_stock').order_by('quantity').values(
+            'id', 'name', 'quantity', 'low_stock_threshold', 'status'
+        )[:BOOTSTRAP_NOTIFICATIONS]
+        return {
+            "inventory": get_report_stats('stock', InventoryItem.objects.all()),
+            "pending_requests": Request.objects.filter(status=Request.PENDING).count(),
+            "low_stock_items": list(low_stock),
+        }
+
 # Generic class-based views (CRUD with permission control)
 class ClassListCreateView(generics.ListCreateAPIView): # ability to view class list
     queryset = Class.objects.all()
     serializer_class = ClassSerializer
     permission_classes = [IsAuthenticated] 
 
+    def list(self, request, *args, **kwargs):
+        # Served from the reference data cache, with ETag/304 support
+        return reference_response(request, 'classes')
+
 class ClassDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Class.objects.all()
     serializer_class = ClassSerializer
@@ -168,6 +280,9 @@ class SubjectListCreateView(generics.ListCreateAPIView):
     serializer_class = SubjectSerializer
     permission_classes = [IsAuthenticated]  
 
+    def list(self, request, *args, **kwargs):
+        return reference_response(request, 'subjects')
+
 class SubjectDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Subject.objects.all()
     serializer_class = SubjectSerializer
@@ -4,3 +4,21 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from . import signals   # Cached auth user invalidation
+        # Cached class/subject lists are invalidated whenever a row changes
+        from stationerySystem.reference_cache import register, content_version
+        from .models import User, TeacherProfile, TeacherClassSubject, Class, Subject
+        from .serializers import ClassSerializer, SubjectSerializer
+        register('classes', lambda: ClassSerializer(Class.objects.all(), many=True).data, Class)
+        register('subjects', lambda: SubjectSerializer(Subject.objects.all(), many=True).data, Subject)
+
+        def teacher_data():
+            # Only the hash is cached: it versions the teacher data nested in request lists
+            return content_version([
+                list(User.objects.order_by('pk').values_list('pk', 'email', 'first_name', 'last_name')),
+                list(TeacherProfile.objects.order_by('pk').values_list('pk', 'user_id', 'bio')),
+                list(TeacherClassSubject.objects.order_by('pk').values_list('pk', 'teacher_id', 'class_taught_id', 'subject_id')),
+            ])
+        register('teachers', teacher_data, User, TeacherProfile, TeacherClassSubject)
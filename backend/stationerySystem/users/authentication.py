@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from .models import User, TeacherProfile
+
+# Short, so a deactivated user, changed password or changed role is picked up quickly even across
+# worker processes that did not see the invalidating save
+AUTH_USER_CACHE_TIMEOUT = 60
+
+
+def auth_user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def cached_fields(model, exclude=()):
+    return [field.attname for field in model._meta.concrete_fields if field.attname not in exclude]
+
+
+def get_cached_user(user_id):
+    """
+    Returns the user with their teacher profile already joined in (None if there is none),
+    from the cache when possible. Users that don't exist are not cached.
+
+    The cache holds column values, never the password hash: the user is rebuilt with the
+    password deferred, so code that needs it (check_password) loads it from the database.
+    For CHECK_REVOKE_TOKEN only the token's revoke claim (an md5 of the hash) is kept.
+    """
+    key = auth_user_key(user_id)
+    cached = cache.get(key)
+    if cached is None:
+        user = User.objects.select_related('teacher_profile').filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).first()
+        if user is None:
+            return None
+        profile = getattr(user, 'teacher_profile', None)
+        cached = {
+            'user': {name: getattr(user, name) for name in cached_fields(User, exclude=('password',))},
+            'profile': {name: getattr(profile, name) for name in cached_fields(TeacherProfile)} if profile else None,
+            'revoke_claim': get_md5_hash_password(user.password) if api_settings.CHECK_REVOKE_TOKEN else None,
+        }
+        cache.set(key, cached, AUTH_USER_CACHE_TIMEOUT)
+
+    user = User.from_db(User.objects.db, list(cached['user']), list(cached['user'].values()))
+    if cached['profile'] is None:
+        # Known to have no profile, so user.teacher_profile raises without another query
+        User._meta.get_field('teacher_profile').set_cached_value(user, None)
+    else:
+        user.teacher_profile = TeacherProfile.from_db(
+            TeacherProfile.objects.db, list(cached['profile']), list(cached['profile'].values())
+        )
+    user._revoke_claim = cached['revoke_claim']
+    return user
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(auth_user_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user from a short-lived per-user cache
+    instead of loading the row (and later the teacher profile) on every request.
+    Entries are dropped whenever the user or their profile is saved or deleted (users/signals.py)
+    and when a queryset update changes a user's password, active status or role.
+    """
+
+    def get_user(self, validated_token):
+        # Same checks as JWTAuthentication.get_user, only the lookup differs
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != user._revoke_claim:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -0,0 +1,44 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from stationerySystem.imports import guess_format, parse_rows
+from users.onboarding import import_teachers
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates teacher accounts in bulk from a CSV or JSON file (the columns/keys of the signup "
+        "form: email, password, firstName, lastName, bio, classSubjects). Invalid rows are skipped "
+        "and listed; the rest are inserted with one bulk insert per table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSON file to import")
+        parser.add_argument('--format', choices=['csv', 'json'],
+                            help="File format (default: guessed from the extension)")
+        parser.add_argument('--workers', type=int,
+                            help="Processes used to hash passwords (default: one per CPU, for large files)")
+        parser.add_argument('--dry-run', action='store_true', help="Validate the file without creating anything")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        try:
+            with open(path, encoding='utf-8-sig') as source:
+                rows = parse_rows(source.read(), fmt)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        started = time.monotonic()
+        result = import_teachers(rows, dry_run=options['dry_run'], workers=options['workers'])
+
+        for error in result['errors']:
+            self.stderr.write(self.style.ERROR(
+                f"Row {error['row']} ({error['email'] or 'no email'}): {' '.join(error['errors'])}"
+            ))
+        if options['dry_run']:
+            self.stdout.write(f"{len(rows) - len(result['errors'])} of {len(rows)} row(s) are valid.")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Created {len(result['created'])} teacher(s), skipped {len(result['errors'])} row(s) "
+                f"in {time.monotonic() - started:.2f}s."
+            ))
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils.translation import gettext_lazy as _
 
@@ -54,8 +54,29 @@ class TeacherClassSubject(models.Model):
         return f"{self.teacher.user.get_full_name()} teaches {self.subject} for {self.class_taught}"
     
 
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        Bulk updates skip post_save, so the cached auth users they make stale (e.g. a
+        password reset or deactivation) are dropped here once the transaction commits.
+        """
+        # Imported here: the authentication module imports the models
+        from .authentication import invalidate_cached_user
+        ids = list(self.values_list('pk', flat=True))
+        updated = super().update(**kwargs)
+
+        def invalidate():
+            for pk in ids:
+                invalidate_cached_user(pk)
+        transaction.on_commit(invalidate)
+        return updated
+
+
 # Custom UserManager for creating standard users and superusers.
 class UserManager(BaseUserManager):
+    def get_queryset(self):
+        return UserQuerySet(self.model, using=self._db)
+
     def create_user(self, email, password=None, **extra_fields):
         """
         Creates and saves a user with the given email and password.
@@ -0,0 +1,156 @@
+"""
+Bulk teacher onboarding.
+
+import_teachers() takes rows shaped like the signup payload (email, password, firstName,
+lastName, bio, classSubjects), validates all of them up front and creates the users,
+profiles and class/subject assignments with one bulk insert per table. Class and subject
+ids are resolved with one in_bulk() query each instead of two get() calls per pair.
+
+Password hashing is deliberately slow and dominates large imports, so it is spread over a
+process pool. Only the hasher and the passwords are sent to the workers, which therefore
+don't need Django to be set up.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.auth.hashers import get_hasher
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from stationerySystem.reference_cache import invalidate
+from .models import User, TeacherProfile, TeacherClassSubject, Class, Subject
+
+# Starting a worker costs about as much as hashing a handful of passwords
+PASSWORDS_PER_WORKER = 10
+BATCH_SIZE = 1000
+
+REQUIRED_FIELDS = ('email', 'password', 'firstName', 'lastName')
+
+
+def parse_class_subjects(value):
+    """
+    [(class_id, subject_id), ...] from the signup-style JSON list, or from a CSV cell
+    of "classId:subjectId" pairs separated by semicolons, e.g. "1:3;2:3".
+    """
+    try:
+        if isinstance(value, str):
+            pairs = [pair.split(':') for pair in value.split(';') if pair.strip()]
+        elif isinstance(value, list) or value is None:
+            pairs = [(cs.get('classId'), cs.get('subjectId')) if isinstance(cs, dict) else cs for cs in value or []]
+        else:
+            raise TypeError
+        return list(dict.fromkeys((int(class_id), int(subject_id)) for class_id, subject_id in pairs))
+    except (TypeError, ValueError):
+        raise ValueError("classSubjects must be pairs of class and subject ids.")
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Hashes the passwords with the default hasher, in a process pool when there are
+    enough of them to be worth it. Salts are drawn here so every hash stays unique.
+    """
+    hasher = get_hasher()
+    salts = [hasher.salt() for _ in passwords]
+    if workers is None:
+        workers = min(os.cpu_count() or 1, len(passwords) // PASSWORDS_PER_WORKER)
+    if workers <= 1:
+        return list(map(hasher.encode, passwords, salts))
+
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(hasher.encode, passwords, salts, chunksize=chunksize))
+
+
+def validate_teacher_rows(rows):
+    """
+    Returns (valid, errors). Valid rows are normalised dicts; errors are
+    {"row", "email", "errors"} entries with 1-based row numbers. Uses one query for
+    existing emails and one in_bulk() per referenced table.
+    """
+    parsed, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        problems = []
+        missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+        if missing:
+            problems.append(f"Missing {', '.join(missing)}.")
+
+        email = User.objects.normalize_email(str(row.get('email') or '').strip())
+        if email:
+            try:
+                validate_email(email)
+            except ValidationError:
+                problems.append("Enter a valid email address.")
+
+        try:
+            pairs = parse_class_subjects(row.get('classSubjects'))
+            if not pairs:
+                problems.append("Add at least one class and subject.")
+        except ValueError as e:
+            pairs = []
+            problems.append(str(e))
+
+        parsed.append({
+            'row': number, 'email': email, 'problems': problems, 'pairs': pairs,
+            'password': str(row.get('password') or ''),
+            'first_name': str(row.get('firstName') or '').strip(),
+            'last_name': str(row.get('lastName') or '').strip(),
+            'bio': str(row.get('bio') or ''),
+        })
+
+    emails = [entry['email'] for entry in parsed if entry['email']]
+    existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+    classes = Class.objects.in_bulk({class_id for entry in parsed for class_id, _ in entry['pairs']})
+    subjects = Subject.objects.in_bulk({subject_id for entry in parsed for _, subject_id in entry['pairs']})
+
+    seen, valid = set(), []
+    for entry in parsed:
+        problems = entry.pop('problems')
+        if entry['email'] in existing:
+            problems.append("A user with this email already exists.")
+        elif entry['email'] and entry['email'] in seen:
+            problems.append("This email appears more than once in the import.")
+        seen.add(entry['email'])
+
+        unknown_classes = sorted({class_id for class_id, _ in entry['pairs'] if class_id not in classes})
+        unknown_subjects = sorted({subject_id for _, subject_id in entry['pairs'] if subject_id not in subjects})
+        if unknown_classes:
+            problems.append(f"Unknown class id(s): {', '.join(map(str, unknown_classes))}.")
+        if unknown_subjects:
+            problems.append(f"Unknown subject id(s): {', '.join(map(str, unknown_subjects))}.")
+
+        if problems:
+            errors.append({'row': entry['row'], 'email': entry['email'], 'errors': problems})
+        else:
+            valid.append(entry)
+    return valid, errors
+
+
+def import_teachers(rows, dry_run=False, workers=None):
+    """
+    Creates a teacher account, profile and class/subject assignments for every valid
+    row; invalid rows are skipped and reported. Returns {"created", "errors"}.
+    """
+    valid, errors = validate_teacher_rows(rows)
+    if dry_run or not valid:
+        return {'created': [], 'errors': errors}
+
+    passwords = hash_passwords([entry['password'] for entry in valid], workers)
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(email=entry['email'], password=password, first_name=entry['first_name'],
+                 last_name=entry['last_name'], role='teacher')
+            for entry, password in zip(valid, passwords)
+        ], batch_size=BATCH_SIZE)
+        profiles = TeacherProfile.objects.bulk_create([
+            TeacherProfile(user=user, bio=entry['bio']) for user, entry in zip(users, valid)
+        ], batch_size=BATCH_SIZE)
+        TeacherClassSubject.objects.bulk_create([
+            TeacherClassSubject(teacher=profile, class_taught_id=class_id, subject_id=subject_id)
+            for profile, entry in zip(profiles, valid)
+            for class_id, subject_id in entry['pairs']
+        ], batch_size=BATCH_SIZE)
+        # bulk_create skips the signals that mark teacher data as changed
+        invalidate('teachers')
+
+    created = [{'row': entry['row'], 'id': user.id, 'email': user.email} for entry, user in zip(valid, users)]
+    return {'created': created, 'errors': errors}
@@ -1,21 +1,22 @@
 from rest_framework import serializers # # Importing DRF's serializers for transforming complex model data to JSON
 from .models import User, TeacherProfile, Class, Subject, TeacherClassSubject # # Importing related models to be serialized
+from stationerySystem.serializers import TimedSerializerMixin
 
 # Serializer for the Subject model
-class SubjectSerializer(serializers.ModelSerializer):
+class SubjectSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Subject
         fields = ['id', 'name', 'description']  # Serializer for the Subject model. 
                                                 # (i.e Converts Subject model fields to JSON)
 
 # Serializer for the Class model
-class ClassSerializer(serializers.ModelSerializer):
+class ClassSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Class
         fields = ['id', 'name', 'grade_level', 'description'] # Serializes all main attributes of a class
 
 # Serializer for mapping teachers to the class and subject they teach
-class TeacherClassSubjectSerializer(serializers.ModelSerializer):
+class TeacherClassSubjectSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     # Nested read-only serializers for detailed output
     class_taught = ClassSerializer(read_only=True)
     subject = SubjectSerializer(read_only=True)
@@ -34,13 +35,13 @@ class TeacherClassSubjectSerializer(serializers.ModelSerializer):
         fields = ['id', 'class_taught', 'subject', 'class_taught_id', 'subject_id']
 
 # Basic User serializer for showing user details
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'email', 'first_name', 'last_name'] # Selective exposure of sensitive data 
 
 # Serializer for the teacher profile
-class TeacherProfileSerializer(serializers.ModelSerializer):
+class TeacherProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     # nested user info displayed, but not editable
     user = UserSerializer(read_only=True)
     # Read-only list of all class-subjects this teacher teaches
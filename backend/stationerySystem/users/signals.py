@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import User, TeacherProfile
+from .authentication import invalidate_cached_user
+
+# === Cached Authentication Invalidation ===
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    """Drops the cached auth user once the change is committed."""
+    transaction.on_commit(lambda: invalidate_cached_user(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=TeacherProfile)
+def invalidate_profile_owner(sender, instance, **kwargs):
+    # The cached user carries their profile
+    transaction.on_commit(lambda: invalidate_cached_user(instance.user_id))
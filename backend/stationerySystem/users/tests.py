@@ -1,3 +1,194 @@
-from django.test import TestCase
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from inventory.models import Category, InventoryItem
+from notifications.models import Notification
+from requests.models import Request
+from .authentication import auth_user_key
+from .models import User, TeacherProfile, TeacherClassSubject, Class, Subject
+from .onboarding import hash_passwords
 
-# Create your tests here.
+
+class CachedJWTAuthenticationTests(TestCase):
+    url = '/api/users/teachers/profile/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='teacher@school.test', password='pass', role='teacher')
+        TeacherProfile.objects.create(user=self.user, bio='Maths')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    def test_user_and_profile_come_from_cache(self):
+        self.client.get(self.url, **self.auth)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, **self.auth)
+        self.assertEqual(response.json()['bio'], 'Maths')
+        self.assertFalse([q for q in queries if 'users_user' in q['sql'] or 'users_teacherprofile' in q['sql']])
+
+    def test_saving_the_user_invalidates_the_cache(self):
+        self.client.get(self.url, **self.auth)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get(self.url, **self.auth).status_code, 401)
+
+    def test_cache_holds_no_password_hash(self):
+        self.client.get(self.url, **self.auth)
+        cached = cache.get(auth_user_key(self.user.pk))
+        self.assertNotIn('password', cached['user'])
+        self.assertNotIn(self.user.password, repr(cached))
+
+    def test_queryset_update_invalidates_the_cache(self):
+        self.client.get(self.url, **self.auth)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(self.url, **self.auth).status_code, 401)
+
+    def test_password_change_revokes_cached_tokens(self):
+        # simplejwt modules hold on to the settings object, so override_settings wouldn't reach them
+        with mock.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True):
+            auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+            self.assertEqual(self.client.get(self.url, **auth).status_code, 200)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.set_password('new pass')
+                self.user.save()
+            self.assertEqual(self.client.get(self.url, **auth).status_code, 401)
+
+
+class SessionBootstrapTests(TestCase):
+    url = '/api/users/bootstrap/'
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Pens')
+        self.classes = [Class.objects.create(name=f'7{c}', grade_level='7') for c in 'ABC']
+        self.subject = Subject.objects.create(name='Maths')
+
+    def get(self, user):
+        token = RefreshToken.for_user(user).access_token
+        return self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def create_teacher(self, email, classes):
+        teacher = User.objects.create_user(email=email, password='pass', role='teacher')
+        profile = TeacherProfile.objects.create(user=teacher)
+        for class_taught in classes:
+            TeacherClassSubject.objects.create(teacher=profile, class_taught=class_taught, subject=self.subject)
+        item = InventoryItem.objects.create(name=f'Pen for {email}', category=self.category, quantity=50)
+        Request.objects.create(item=item, quantity=1, user=teacher)
+        Notification.objects.create(recipient=teacher, message='Approved', notification_type='REQUEST_STATUS')
+        return teacher
+
+    def test_teacher_bootstrap_uses_a_fixed_number_of_queries(self):
+        small = self.create_teacher('a@school.test', self.classes[:1])
+        large = self.create_teacher('b@school.test', self.classes)
+        for _ in range(5):
+            Notification.objects.create(recipient=large, message='Approved', notification_type='REQUEST_STATUS')
+        # Warm the auth user and content type caches, which the first call of each user fills
+        self.get(small)
+        self.get(large)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            self.get(small)
+        with CaptureQueriesContext(connection) as large_queries:
+            data = self.get(large).json()
+
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertEqual(len(data['profile']['class_subjects']), 3)
+        self.assertEqual(data['unread_count'], 6)
+        self.assertEqual(len(data['notifications']), 6)
+        self.assertEqual(data['dashboard']['requests']['pending'], 1)
+
+    def test_manager_dashboard_summarises_inventory(self):
+        manager = User.objects.create_user(email='m@school.test', password='pass', role='stock_manager')
+        InventoryItem.objects.create(name='Low', category=self.category, quantity=2)
+        data = self.get(manager).json()
+        self.assertIsNone(data['profile'])
+        self.assertEqual(data['dashboard']['inventory']['low_stock_items'], 1)
+        self.assertEqual([item['name'] for item in data['dashboard']['low_stock_items']], ['Low'])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class TeacherImportTests(TestCase):
+    url = '/api/users/teachers/import/'
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email='admin@school.test', password='pass', role='admin')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.admin).access_token}'}
+        self.classes = [Class.objects.create(name=f'8{c}', grade_level='8') for c in 'AB']
+        self.subject = Subject.objects.create(name='History')
+
+    def teacher(self, email, class_ids=None):
+        return {
+            'email': email, 'password': 'secret', 'firstName': 'Ada', 'lastName': 'Byron',
+            'classSubjects': [{'classId': class_id, 'subjectId': self.subject.id}
+                              for class_id in class_ids or [self.classes[0].id]],
+        }
+
+    def test_import_uses_a_fixed_number_of_queries(self):
+        def run(count):
+            rows = [self.teacher(f't{count}-{i}@school.test', [c.id for c in self.classes]) for i in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, rows, content_type='application/json', **self.auth)
+            self.assertEqual(response.status_code, 201)
+            return len(queries)
+
+        run(1)  # Warms the auth user cache
+        self.assertEqual(run(2), run(20))
+        teacher = User.objects.get(email='t20-0@school.test')
+        self.assertTrue(teacher.check_password('secret'))
+        self.assertEqual(teacher.teacher_profile.teacherclasssubject_set.count(), 2)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        rows = [
+            self.teacher('new@school.test'),
+            self.teacher('admin@school.test'),
+            self.teacher('new@school.test'),
+            self.teacher('other@school.test', [999]),
+            {'email': 'not-an-email', 'password': 'secret', 'firstName': 'A', 'lastName': 'B'},
+            {**self.teacher('odd@school.test'), 'classSubjects': 5},
+        ]
+        response = self.client.post(self.url, rows, content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual([row['email'] for row in data['created']], ['new@school.test'])
+        self.assertEqual([error['row'] for error in data['errors']], [2, 3, 4, 5, 6])
+        self.assertIn("Unknown class id(s): 999.", data['errors'][2]['errors'])
+        self.assertIn("classSubjects must be pairs of class and subject ids.", data['errors'][4]['errors'])
+        self.assertFalse(User.objects.filter(email='other@school.test').exists())
+
+    def test_only_admins_can_import(self):
+        teacher = User.objects.create_user(email='t@school.test', password='pass', role='teacher')
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(teacher).access_token}'}
+        response = self.client.post(self.url, [self.teacher('x@school.test')], content_type='application/json', **auth)
+        self.assertEqual(response.status_code, 403)
+
+    def test_command_imports_csv(self):
+        pairs = ';'.join(f'{c.id}:{self.subject.id}' for c in self.classes)
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as source:
+            source.write('email,password,firstName,lastName,bio,classSubjects\n')
+            source.write(f'csv@school.test,secret,Grace,Hopper,Navy,{pairs}\n')
+            source.write('bad@school.test,,Alan,Turing,,\n')
+        self.addCleanup(os.remove, source.name)
+
+        stderr = StringIO()
+        call_command('import_teachers', source.name, stdout=StringIO(), stderr=stderr)
+        profile = TeacherProfile.objects.get(user__email='csv@school.test')
+        self.assertEqual(profile.bio, 'Navy')
+        self.assertEqual(profile.teacherclasssubject_set.count(), 2)
+        self.assertIn('Row 2', stderr.getvalue())
+
+    def test_passwords_hashed_in_a_process_pool_verify(self):
+        hashes = hash_passwords(['one', 'two', 'three'], workers=2)
+        self.assertTrue(all(h.startswith('md5$') for h in hashes))
+        self.assertEqual(len(set(hashes)), 3)
+        user = User(password=hashes[1])
+        self.assertTrue(user.check_password('two'))
@@ -2,7 +2,9 @@ from django.urls import path
 # Importing views (API endpoints) from the users/api.py module
 from .api import (
     SignUpView,
+    TeacherImportView,
     LoginView,
+    SessionBootstrapView,
     ClassListCreateView,
     ClassDetailView,
     SubjectListCreateView,
@@ -17,6 +19,7 @@ urlpatterns = [
     # User registration and login endpoints (RESTful design, URL routing)
     path('signup/', SignUpView.as_view(), name='signup'),   # handles user registration
     path('login/', LoginView.as_view(), name='login'), # handles user login and token returns
+    path('bootstrap/', SessionBootstrapView.as_view(), name='session-bootstrap'), # everything the dashboard needs after login
     
     # Class management (List, Create, Retrieve, Update, Delete)
     path('classes/', ClassListCreateView.as_view(), name='class-list'),  # view of create classes
@@ -28,6 +31,7 @@ urlpatterns = [
 
     # Teacher profile and class-subject assignment endpoints
     path('teachers/profile/', TeacherProfileView.as_view(), name='teacher-profile'),    # get or update teacher profile
+    path('teachers/import/', TeacherImportView.as_view(), name='teacher-import'),    # bulk onboarding from CSV/JSON (admins)
     path('teachers/classes/', TeacherClassesView.as_view(), name='teacher-classes'),    # View all classes a teacher is assigned to
     path('teachers/classes/<int:pk>/',TeacherClassDetailView.as_view(), name='teacher_class_detail'), # Modify a specific class-subject assignment
 ]
\ No newline at end of file